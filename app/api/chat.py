@@ -1,36 +1,76 @@
+import json
+from typing import Optional
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import redis.asyncio as redis
 
 from app.core.db import get_session
 from app.core.config import get_settings
-from app.repositories.vector_store import VectorStore
+from app.repositories.vector_store import VectorStore, create_vector_store
+from app.repositories.collection_profiles import default_search_params
 from app.repositories.redis_repo import ChatHistory
-from app.utils.embeddings import EmbeddingClient
 from app.utils.llm import LLMClient
-from app.services.rag_service import RAGService
+from app.utils.embedding_cache import CachedEmbedder
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.api.deps import provide_answer_cache, provide_query_embedder, provide_reranker, provide_sparse_embedder
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+from app.utils.reranker import Reranker
+from app.services.rag_service import RAGService, RetrievalOptions
 from app.services.booking_service import BookingService
 from app.schemas.chat import ChatRequest, ChatResponse
 router = APIRouter(prefix="/chat", tags=["chat"])
 _SETTINGS = get_settings()
+_SEARCH_PARAMS = default_search_params()
 
 # Dependency Providers
 def provide_vector_store(request: Request) -> VectorStore:
-    return VectorStore(client=request.app.state.qdrant, collection=_SETTINGS.QDRANT_COLLECTION)
+    return create_vector_store(
+        client=request.app.state.qdrant, collection=_SETTINGS.QDRANT_COLLECTION,
+        sparse_vector_name=_SETTINGS.SPARSE_VECTOR_NAME, search_params=_SEARCH_PARAMS,
+    )
 
-def provide_embedder() -> EmbeddingClient: return EmbeddingClient()
-def provide_llm_client() -> LLMClient: return LLMClient()
+def provide_llm_client(request: Request) -> LLMClient: return LLMClient(scheduler=getattr(request.app.state, "llm_scheduler", None))
 def provide_chat_history(request: Request) -> ChatHistory: return ChatHistory(client=request.app.state.redis)
 def provide_booking_service(session: AsyncSession = Depends(get_session)) -> BookingService: return BookingService(session=session)
 
 def get_rag_service(
-    vs: VectorStore = Depends(provide_vector_store), emb: EmbeddingClient = Depends(provide_embedder),
+    vs: VectorStore = Depends(provide_vector_store), emb: CachedEmbedder = Depends(provide_query_embedder),
     hist: ChatHistory = Depends(provide_chat_history), llm: LLMClient = Depends(provide_llm_client),
     book: BookingService = Depends(provide_booking_service),
+    cache: Optional[SemanticAnswerCache] = Depends(provide_answer_cache),
+    sparse: Optional[SparseEmbeddingClient] = Depends(provide_sparse_embedder),
+    reranker: Optional[Reranker] = Depends(provide_reranker),
 ) -> RAGService:
-    return RAGService(vector_store=vs, embedder=emb, chat_history=hist, llm_client=llm, booking_service=book)
+    return RAGService(
+        vector_store=vs, embedder=emb, chat_history=hist, llm_client=llm, booking_service=book,
+        answer_cache=cache, sparse_embedder=sparse, reranker=reranker,
+    )
+
+def _retrieval_options(req: ChatRequest) -> RetrievalOptions:
+    return RetrievalOptions(
+        mode=req.retrieval_mode, rerank=req.rerank, filters=req.filters,
+        mmr=req.mmr, mmr_lambda=req.mmr_lambda, mmr_fetch_k=req.mmr_fetch_k,
+    )
 
 # API Endpoint
 @router.post("", response_model=ChatResponse)
 async def chat_endpoint(req: ChatRequest, service: RAGService = Depends(get_rag_service)) -> ChatResponse:
-    return await service.chat(user_message=req.message, conversation_id=req.conversation_id, k=req.retrieval_k)
\ No newline at end of file
+    return await service.chat(user_message=req.message, conversation_id=req.conversation_id, k=req.retrieval_k, options=_retrieval_options(req))
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_stream_endpoint(req: ChatRequest, service: RAGService = Depends(get_rag_service)) -> StreamingResponse:
+    events = service.chat_stream(user_message=req.message, conversation_id=req.conversation_id, k=req.retrieval_k, options=_retrieval_options(req))
+    # Run retrieval before the 200 goes out, so its failures still surface as HTTP errors
+    first = await events.__anext__()
+    async def event_source():
+        yield _sse(*first)
+        async for event, data in events:
+            yield _sse(event, data)
+    return StreamingResponse(
+        event_source(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,44 @@
+# Dependency providers shared by several routers
+from typing import Optional
+from fastapi import HTTPException, Request
+
+from app.utils.embeddings import EmbeddingClient, EmbeddingRegistry
+from app.utils.embedding_cache import CachedEmbedder
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.utils.extraction_pool import ExtractionPool
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+from app.utils.reranker import Reranker
+
+
+def provide_embedder(request: Request) -> EmbeddingClient:
+    registry: EmbeddingRegistry = request.app.state.embedders
+    try:
+        return registry.get()
+    except LookupError as e:
+        # Model still loading (or failed to load); readiness probe should keep traffic away
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def provide_query_embedder(request: Request) -> CachedEmbedder:
+    # Query embeddings: process-wide cache in front of the micro-batching scheduler
+    embedder = getattr(request.app.state, "query_embedder", None)
+    if embedder is None:
+        raise HTTPException(status_code=503, detail="Embedding model is still loading")
+    return embedder
+
+
+def provide_answer_cache(request: Request) -> Optional[SemanticAnswerCache]:
+    return getattr(request.app.state, "answer_cache", None)
+
+
+def provide_extraction_pool(request: Request) -> Optional[ExtractionPool]:
+    return getattr(request.app.state, "extraction_pool", None)
+
+
+def provide_sparse_embedder(request: Request) -> Optional[SparseEmbeddingClient]:
+    # None when sparse (hybrid) indexing is disabled
+    return getattr(request.app.state, "sparse_embedder", None)
+
+
+def provide_reranker(request: Request) -> Optional[Reranker]:
+    return getattr(request.app.state, "reranker", None)
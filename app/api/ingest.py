@@ -1,58 +1,91 @@
-from typing import Optional
+from typing import Optional, Union
 import json
-from fastapi import APIRouter, Depends, File, Form, UploadFile, Request, HTTPException
+import os
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_session
 from app.core.config import get_settings
-from app.schemas.ingest import IngestResponse, ChunkStrategy
-from app.repositories.vector_store import VectorStore
+from app.schemas.ingest import DeleteResponse, IngestJobAccepted, IngestJobStatus, IngestResponse, ChunkStrategy
+from app.repositories.job_queue import IngestJobQueue
+from app.repositories.vector_store import VectorStore, create_vector_store
 from app.utils.embeddings import EmbeddingClient
-from app.services.ingestion_service import IngestionService
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.utils.extraction_pool import ExtractionPool
+from app.api.deps import provide_answer_cache, provide_embedder, provide_extraction_pool, provide_sparse_embedder
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+from app.services.ingestion_service import IngestionService, spool_upload
 
 router = APIRouter(prefix="/ingest", tags=["ingestion"])
 _SETTINGS = get_settings()
 
 def provide_vector_store(request: Request) -> VectorStore:
     client = request.app.state.qdrant
-    return VectorStore(client=client, collection=_SETTINGS.QDRANT_COLLECTION)
-
-def provide_embedder(request: Request) -> EmbeddingClient:
-    # Lazy-create and cache in app.state
-    eb = getattr(request.app.state, "embedder", None)
-    if eb is not None:
-        return eb
-    try:
-        eb = EmbeddingClient()
-    except RuntimeError as e:
-        # e.g., OPENAI_API_KEY missing
-        raise HTTPException(status_code=500, detail=str(e))
-    request.app.state.embedder = eb
-    return eb
+    return create_vector_store(client=client, collection=_SETTINGS.QDRANT_COLLECTION, sparse_vector_name=_SETTINGS.SPARSE_VECTOR_NAME)
+
+def provide_job_queue(request: Request) -> IngestJobQueue:
+    return IngestJobQueue(client=request.app.state.redis)
 
 def get_ingestion_service(
     session: AsyncSession = Depends(get_session),
     vector_store: VectorStore = Depends(provide_vector_store),
     embedder: EmbeddingClient = Depends(provide_embedder),
+    answer_cache: Optional[SemanticAnswerCache] = Depends(provide_answer_cache),
+    extraction_pool: Optional[ExtractionPool] = Depends(provide_extraction_pool),
+    sparse_embedder: Optional[SparseEmbeddingClient] = Depends(provide_sparse_embedder),
 ) -> IngestionService:
-    return IngestionService(vector_store=vector_store, embedder=embedder, session=session)
+    return IngestionService(
+        vector_store=vector_store, embedder=embedder, session=session,
+        answer_cache=answer_cache, extraction_pool=extraction_pool, sparse_embedder=sparse_embedder,
+    )
 
-@router.post("", response_model=IngestResponse)
+@router.post("", response_model=IngestResponse, responses={202: {"model": IngestJobAccepted}})
 async def ingest_document(
+    request: Request,
     file: UploadFile = File(...),
     chunk_strategy: ChunkStrategy = Form("semantic"),
     chunk_size: int = Form(500),
     overlap: int = Form(50),
     use_ocr: bool = Form(True),
     metadata: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None, description="Ingest as a new version of this document"),
+    source_uri: Optional[str] = Form(None, description="Stable source key; a stored document with the same key is updated in place"),
+    run_async: bool = Query(False, alias="async", description="Queue the file for a worker and return 202 with a job id"),
     service: IngestionService = Depends(get_ingestion_service),
-) -> IngestResponse:
+    queue: IngestJobQueue = Depends(provide_job_queue),
+) -> Union[IngestResponse, JSONResponse]:
     extra = {}
     if metadata:
         try:
             extra = json.loads(metadata)
         except Exception:
             extra = {}
+
+    if run_async:
+        if _SETTINGS.VECTOR_BACKEND == "local":
+            # the worker would need the local store directory this process already holds
+            raise HTTPException(status_code=400, detail="Async ingestion needs a shared vector store (VECTOR_BACKEND=qdrant)")
+        path, checksum, size = await spool_upload(file)
+        if not size:
+            os.unlink(path)
+            raise HTTPException(status_code=400, detail="Empty file")
+        job_id = await queue.enqueue({
+            "path": path,
+            "filename": file.filename or "",
+            "content_type": file.content_type,
+            "checksum": checksum,
+            "chunk_strategy": chunk_strategy,
+            "chunk_size": chunk_size,
+            "overlap": overlap,
+            "use_ocr": use_ocr,
+            "extra_metadata": extra or None,
+            "document_id": document_id,
+            "source_uri": source_uri,
+        })
+        accepted = IngestJobAccepted(job_id=job_id, status_url=str(request.url_for("get_ingest_job", job_id=job_id)))
+        return JSONResponse(status_code=202, content=accepted.model_dump())
+
     return await service.ingest(
         file=file,
         chunk_strategy=chunk_strategy,
@@ -60,4 +93,20 @@ async def ingest_document(
         overlap=overlap,
         use_ocr=use_ocr,
         extra_metadata=extra or None,
-    )
\ No newline at end of file
+        document_id=document_id,
+        source_uri=source_uri,
+    )
+
+@router.delete("/{document_id}", response_model=DeleteResponse)
+async def delete_document(
+    document_id: str,
+    service: IngestionService = Depends(get_ingestion_service),
+) -> DeleteResponse:
+    return await service.delete_document(document_id)
+
+@router.get("/jobs/{job_id}", response_model=IngestJobStatus, name="get_ingest_job")
+async def get_ingest_job(job_id: str, queue: IngestJobQueue = Depends(provide_job_queue)) -> IngestJobStatus:
+    job = await queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestJobStatus(**job)
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,15 +8,108 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
     EMBEDDING_DIM: int = 384
     OPENAI_API_KEY: Optional[str] = None
+    # Query-embedding micro-batching (/chat)
+    EMBED_BATCH_MAX_SIZE: int = 32
+    EMBED_BATCH_MAX_WAIT_MS: float = 5.0
+    # Query-embedding cache (in-process LRU + optional Redis tier)
+    EMBED_CACHE_MAX_ENTRIES: int = 10000
+    EMBED_CACHE_TTL_SECONDS: int = 3600 * 24
+    EMBED_CACHE_REDIS: bool = True
 
     # LLM
     LLM_PROVIDER: Literal["ollama", "openai"] = "ollama"
     LLM_MODEL: str = "gemma:2b"
+    # Admission control (app.utils.llm_scheduler): calls running against the model server,
+    # calls allowed to wait (beyond that: 429), longest wait per call type before a 503,
+    # and the queue depth above which optional calls (condensing, summaries) are skipped
+    LLM_MAX_CONCURRENCY: int = 2
+    LLM_MAX_QUEUE: int = 32
+    LLM_QUEUE_TIMEOUTS: Dict[str, float] = {"answer": 15.0, "condense": 2.0, "summary": 60.0}
+    LLM_DEGRADE_QUEUE_DEPTH: int = 8
     OLLAMA_HOST: str = "http://localhost:11434"
 
+    # Text extraction / OCR process pool (0 = one worker per CPU)
+    EXTRACTION_WORKERS: int = 0
+    EXTRACTION_MAX_QUEUE: int = 8
+    EXTRACTION_PAGE_BATCH: int = 8  # PDF pages parsed per worker task
+
+    # Streaming ingestion pipeline
+    INGEST_SPOOL_DIR: Optional[str] = None  # temp dir for uploads; system default if unset
+    INGEST_EMBED_BATCH_SIZE: int = 64  # chunks per embed call / pipeline batch
+    INGEST_QUEUE_BATCHES: int = 2  # batches buffered between pipeline stages
+    # Async ingestion jobs (?async=true); INGEST_SPOOL_DIR must be shared with the workers
+    INGEST_WORKER_CONCURRENCY: int = 2
+    INGEST_JOB_MAX_ATTEMPTS: int = 3
+    INGEST_JOB_STALE_SECONDS: int = 600
+    INGEST_JOB_RECOVER_INTERVAL_SECONDS: int = 60  # how often each worker requeues stale jobs
+    INGEST_JOB_RETRY_BASE_SECONDS: float = 5.0  # retry n waits base * 2**(n-1), up to the max
+    INGEST_JOB_RETRY_MAX_SECONDS: float = 300.0
+
+    # Vector store backend: "qdrant", or "local" = in-process exact search over a memory-mapped
+    # matrix in LOCAL_VECTOR_DIR (small corpora, CI, dev; one process per directory)
+    VECTOR_BACKEND: Literal["qdrant", "local"] = "qdrant"
+    LOCAL_VECTOR_DIR: str = "./data/vectors"
+
     # Qdrant
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_COLLECTION: str = "docs_local"
+    QDRANT_PREFER_GRPC: bool = False  # binary transport for upserts/queries (port 6334)
+    QDRANT_GRPC_PORT: int = 6334
+    # Ingestion writes: points per upsert request and requests in flight (sent with wait=false,
+    # then confirmed by an exact count within QDRANT_UPSERT_CONFIRM_TIMEOUT_SECONDS)
+    QDRANT_UPSERT_BATCH_SIZE: int = 256
+    QDRANT_UPSERT_PARALLELISM: int = 4
+    QDRANT_UPSERT_CONFIRM_TIMEOUT_SECONDS: float = 30.0
+    # Collection layout the collection was created with (scripts/init_qdrant.py --profile);
+    # sets the query-time hnsw_ef / quantization oversampling, which these override
+    QDRANT_PROFILE: str = "default"
+    QDRANT_HNSW_EF: Optional[int] = None
+    QDRANT_OVERSAMPLING: Optional[float] = None
+    # Extra payload fields (from ingest `metadata`) that chat requests may filter on, with
+    # their Qdrant index type: keyword | integer | bool (filters are exact matches, so no float).
+    # Indexed by scripts/init_qdrant.py.
+    # e.g. INDEXED_PAYLOAD_FIELDS='{"tenant_id": "keyword", "year": "integer"}'
+    INDEXED_PAYLOAD_FIELDS: Dict[str, Literal["keyword", "integer", "bool"]] = {}
+    # Hybrid retrieval: sparse (BM25) vectors stored next to the dense one; None disables them.
+    # The collection needs the sparse vector config from scripts/init_qdrant.py.
+    SPARSE_EMBEDDING_MODEL: Optional[str] = None  # e.g. "Qdrant/bm25"
+    SPARSE_VECTOR_NAME: str = "bm25"
+    RETRIEVAL_MODE: Literal["dense", "hybrid"] = "dense"  # default for ChatRequest.retrieval_mode
+    HYBRID_PREFETCH_LIMIT: int = 20  # candidates per branch before RRF fusion
+    # Cross-encoder rerank of retrieved chunks; None disables it
+    RERANK_MODEL: Optional[str] = None  # e.g. "Xenova/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # over-fetched before keeping the top retrieval_k
+    RERANK_BUDGET_MS: float = 250.0  # past this, the retrieval order is used
+    RERANK_WORKERS: int = 1
+    # Maximal Marginal Relevance: pick a diverse top k out of MMR_FETCH_K candidates
+    # (defaults for ChatRequest.mmr / mmr_lambda / mmr_fetch_k); lambda 1 = relevance only
+    MMR_ENABLED: bool = False
+    MMR_LAMBDA: float = 0.5
+    MMR_FETCH_K: int = 20
+    # Follow-up turns: "speculative" searches the raw message while the condense-question LLM
+    # call runs, and drops that call when the message reads as self-contained and its best
+    # dense hit scores at least CONDENSE_SKIP_MIN_SCORE; "always" condenses first
+    CONDENSE_MODE: Literal["always", "speculative"] = "speculative"
+    CONDENSE_SKIP_MIN_SCORE: float = 0.5
+
+    # Retrieved chunks are merged with their neighbours (overlap removed) and packed, best
+    # first, into at most CONTEXT_TOKEN_BUDGET prompt tokens
+    CONTEXT_TOKEN_BUDGET: int = 2000
+    CONTEXT_MERGE_ADJACENT: bool = True
+    # Conversation memory: the newest messages within CHAT_HISTORY_TOKEN_BUDGET go to the LLM
+    # verbatim (at most CHAT_HISTORY_WINDOW_MESSAGES are fetched); older ones are folded into a
+    # rolling summary in the background once CHAT_SUMMARY_MIN_MESSAGES have accumulated
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_HISTORY_WINDOW_MESSAGES: int = 20
+    CHAT_HISTORY_MAX_TOKENS: int = 3000  # hard cap when unsummarized messages stretch the window
+    CHAT_HISTORY_MAX_MESSAGES: int = 100  # Redis list is trimmed to this, never past the summary
+    CHAT_SUMMARY_MIN_MESSAGES: int = 4
+    CHAT_SUMMARY_MAX_WORDS: int = 200
+
+    # Semantic answer cache for /chat (opt-in)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_COLLECTION: Optional[str] = None  # defaults to "<QDRANT_COLLECTION>_answers"
 
     # MySQL
     MYSQL_HOST: str = "127.0.0.1"
@@ -30,6 +123,10 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def semantic_cache_collection(self) -> str:
+        return self.SEMANTIC_CACHE_COLLECTION or f"{self.QDRANT_COLLECTION}_answers"
+
     @property
     def mysql_async_url(self) -> str:
         return (
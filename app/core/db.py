@@ -15,4 +15,11 @@ _SessionLocal = async_sessionmaker(_engine, expire_on_commit=False, autoflush=Fa
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with _SessionLocal() as session:
         yield session
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Session for code outside a request (workers, CLI tools)."""
+    async with _SessionLocal() as session:
+        yield session
         
@@ -1,26 +1,116 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 from fastapi import FastAPI
-from qdrant_client import AsyncQdrantClient
+from fastapi.responses import JSONResponse
 import redis.asyncio as redis
 
 from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.utils.embeddings import EmbeddingRegistry
+from app.utils.embedding_scheduler import EmbeddingScheduler
+from app.utils.embedding_cache import CachedEmbedder
+from app.repositories.vector_store import create_qdrant_client, create_vector_store
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.repositories.ocr_cache import OcrCache
+from app.utils.extraction_pool import ExtractionPool
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+from app.utils.reranker import Reranker
+from app.utils.llm_scheduler import LLMScheduler
 from app.api.ingest import router as ingest_router
 from app.api.chat import router as chat_router # IMPORT
 
 _SETTINGS = get_settings()
+_log = logging.getLogger(__name__)
+
+async def _load_optional_model(app: FastAPI, name: str, model_name: str, model: Any) -> None:
+    """Loads an optional model into app.state.<name>; a failure is recorded, not raised,
+    so the service stays up with that feature disabled."""
+    status = app.state.optional_models[name] = {"model": model_name, "ready": False, "error": None}
+    try:
+        await asyncio.to_thread(model.load)
+    except Exception as e:
+        status["error"] = str(e)
+        if hasattr(model, "shutdown"):
+            model.shutdown()
+        METRICS.inc(f"startup.model_load_failed.{name}")
+        _log.exception("Failed to load %s model %s", name, model_name)
+        return
+    status["ready"] = True
+    setattr(app.state, name, model)
+
+async def _load_embedders(app: FastAPI) -> None:
+    # dense model first: /chat and /ingest need it, the others only add features
+    client = await app.state.embedders.load()
+    scheduler = EmbeddingScheduler(client)
+    scheduler.start()
+    app.state.embedding_scheduler = scheduler
+    app.state.query_embedder = CachedEmbedder(
+        scheduler, redis_client=app.state.redis_raw if _SETTINGS.EMBED_CACHE_REDIS else None
+    )
+    if _SETTINGS.SPARSE_EMBEDDING_MODEL:
+        await _load_optional_model(app, "sparse_embedder", _SETTINGS.SPARSE_EMBEDDING_MODEL, SparseEmbeddingClient())
+    if _SETTINGS.RERANK_MODEL:
+        await _load_optional_model(app, "reranker", _SETTINGS.RERANK_MODEL, Reranker())
+
+def _log_load_failure(task: "asyncio.Task[None]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        METRICS.inc("startup.model_load_failed.embedding")
+        _log.error("Embedding model loading failed", exc_info=task.exception())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    app.state.qdrant = AsyncQdrantClient(url=_SETTINGS.QDRANT_URL)
+    app.state.qdrant = create_qdrant_client()
     app.state.redis = redis.from_url(_SETTINGS.REDIS_URL, decode_responses=True) # REDIS
+    # Same server, but without response decoding: for packed binary values (float32 vectors)
+    app.state.redis_raw = redis.from_url(_SETTINGS.REDIS_URL, decode_responses=False)
+    app.state.answer_cache = None
+    if _SETTINGS.SEMANTIC_CACHE_ENABLED:
+        app.state.answer_cache = SemanticAnswerCache(
+            create_vector_store(client=app.state.qdrant, collection=_SETTINGS.semantic_cache_collection)
+        )
+    app.state.extraction_pool = ExtractionPool(ocr_cache=OcrCache(app.state.redis))
+    app.state.llm_scheduler = LLMScheduler()  # one queue in front of the model server for all requests
+    # Load the embedding model once per process; /health/ready stays 503 until it is in memory
+    app.state.embedders = EmbeddingRegistry()
+    app.state.embedding_scheduler = None
+    app.state.query_embedder = None
+    app.state.sparse_embedder = None
+    app.state.reranker = None
+    app.state.optional_models = {}  # name -> {"model", "ready", "error"}; failures leave the feature off
+    embedder_task = asyncio.create_task(_load_embedders(app))
+    embedder_task.add_done_callback(_log_load_failure)
     yield
+    embedder_task.cancel()
+    if app.state.embedding_scheduler is not None:
+        await app.state.embedding_scheduler.stop()
+    app.state.extraction_pool.shutdown()
+    if app.state.reranker is not None:
+        app.state.reranker.shutdown()
     await app.state.qdrant.close()
     await app.state.redis.close() # REDIS
+    await app.state.redis_raw.close()
 
 app = FastAPI(title="AI Backend", lifespan=lifespan)
 app.include_router(ingest_router)
 app.include_router(chat_router) # ROUTER
 
 @app.get("/")
-async def root(): return {"message": "Service is up. See /docs for API details."}
\ No newline at end of file
+async def root(): return {"message": "Service is up. See /docs for API details."}
+
+@app.get("/health/live")
+async def liveness(): return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness():
+    registry: EmbeddingRegistry = app.state.embedders
+    body = {
+        "ready": registry.ready,
+        "embedding_models": registry.status(),
+        "optional_models": app.state.optional_models,
+    }
+    return JSONResponse(body, status_code=200 if registry.ready else 503)
+
+@app.get("/metrics")
+async def metrics(): return METRICS.snapshot()
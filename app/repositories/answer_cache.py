@@ -0,0 +1,60 @@
+# Semantic answer cache: answers keyed by question-embedding similarity
+from __future__ import annotations
+import time
+from typing import List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.repositories.vector_store import VectorStore
+from app.schemas.chat import Citation
+
+_SETTINGS = get_settings()
+
+
+class SemanticAnswerCache:
+    """Stores (question embedding -> answer, citations, contributing doc_ids) in a
+    dedicated vector collection. Entries are dropped when any contributing
+    document is re-ingested or deleted."""
+
+    def __init__(self, store: VectorStore, threshold: Optional[float] = None, dim: Optional[int] = None):
+        self.store = store
+        self.threshold = threshold if threshold is not None else _SETTINGS.SEMANTIC_CACHE_THRESHOLD
+        self.dim = dim or _SETTINGS.EMBEDDING_DIM
+        self._ready = False
+
+    async def _ensure(self) -> None:
+        if not self._ready:
+            await self.store.ensure_collection(self.dim, keyword_indexes=("doc_ids",))
+            self._ready = True
+
+    async def lookup(self, vector: Sequence[float]) -> Optional[Tuple[str, List[Citation]]]:
+        await self._ensure()
+        hits = await self.store.search(vector, limit=1, score_threshold=self.threshold)
+        if not hits:
+            METRICS.inc("answer_cache.misses")
+            return None
+        METRICS.inc("answer_cache.hits")
+        payload = hits[0].payload or {}
+        citations = [Citation(**c) for c in payload.get("citations", [])]
+        return payload.get("answer", ""), citations
+
+    async def store_answer(
+        self, question: str, vector: Sequence[float], answer: str, citations: List[Citation]
+    ) -> None:
+        await self._ensure()
+        payload = {
+            "question": question,
+            "answer": answer,
+            "citations": [c.model_dump() for c in citations],
+            "doc_ids": sorted({c.doc_id for c in citations}),
+            "created_at": time.time(),
+        }
+        await self.store.upsert(ids=[str(uuid4())], vectors=[list(vector)], payloads=[payload])
+
+    async def invalidate_documents(self, doc_ids: Sequence[str]) -> None:
+        if not doc_ids:
+            return
+        await self._ensure()
+        await self.store.delete_by_field("doc_ids", doc_ids)
+        METRICS.inc("answer_cache.invalidations")
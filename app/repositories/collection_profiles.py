@@ -0,0 +1,92 @@
+# Named Qdrant collection layouts (HNSW, quantization, on-disk storage) and their query-time settings
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from qdrant_client.models import (
+    BinaryQuantization, BinaryQuantizationConfig, Distance, HnswConfigDiff, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams,
+)
+
+from app.core.config import get_settings
+
+_SETTINGS = get_settings()
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    name: str
+    description: str
+    m: int = 16
+    ef_construct: int = 100
+    quantization: Optional[str] = None  # "int8" | "binary"
+    vectors_on_disk: bool = False  # full-precision vectors; quantized ones stay in RAM
+    hnsw_on_disk: bool = False
+    payload_on_disk: bool = False
+    # query time
+    hnsw_ef: Optional[int] = None
+    oversampling: Optional[float] = None  # candidates fetched from quantized vectors, x limit
+    rescore: bool = True  # re-rank those candidates with the full-precision vectors
+
+    def vectors_config(self, dim: int) -> VectorParams:
+        return VectorParams(size=dim, distance=Distance.COSINE, on_disk=self.vectors_on_disk)
+
+    def hnsw_config(self) -> HnswConfigDiff:
+        return HnswConfigDiff(m=self.m, ef_construct=self.ef_construct, on_disk=self.hnsw_on_disk)
+
+    def quantization_config(self):
+        if self.quantization == "int8":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def search_params(self, hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None) -> Optional[SearchParams]:
+        hnsw_ef = hnsw_ef or self.hnsw_ef
+        oversampling = oversampling or self.oversampling
+        quantization = None
+        if self.quantization:
+            quantization = QuantizationSearchParams(rescore=self.rescore, oversampling=oversampling)
+        if hnsw_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    p.name: p
+    for p in (
+        CollectionProfile("default", "float32 vectors and payload in RAM, default HNSW"),
+        CollectionProfile(
+            "high_recall", "denser HNSW graph and wider search; most RAM and CPU",
+            m=32, ef_construct=256, hnsw_ef=256,
+        ),
+        CollectionProfile(
+            "int8", "int8 scalar quantization in RAM, float32 vectors and payload on disk; ~4x less vector RAM",
+            quantization="int8", vectors_on_disk=True, payload_on_disk=True, hnsw_ef=128, oversampling=2.0,
+        ),
+        CollectionProfile(
+            "binary", "1-bit quantization in RAM, float32 on disk; ~32x less vector RAM, needs oversampling",
+            quantization="binary", vectors_on_disk=True, payload_on_disk=True, hnsw_ef=128, oversampling=3.0,
+        ),
+        CollectionProfile(
+            "low_memory", "int8 quantization with vectors, HNSW graph and payload all on disk",
+            quantization="int8", vectors_on_disk=True, hnsw_on_disk=True, payload_on_disk=True,
+            hnsw_ef=96, oversampling=2.0,
+        ),
+    )
+}
+
+
+def get_profile(name: Optional[str] = None) -> CollectionProfile:
+    name = name or _SETTINGS.QDRANT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown collection profile '{name}'; known: {', '.join(PROFILES)}")
+
+
+def default_search_params() -> Optional[SearchParams]:
+    """Query settings for the configured profile, with QDRANT_HNSW_EF / QDRANT_OVERSAMPLING overrides."""
+    return get_profile().search_params(_SETTINGS.QDRANT_HNSW_EF, _SETTINGS.QDRANT_OVERSAMPLING)
@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+import redis.asyncio as redis
+
+
+class IngestJobQueue:
+    """Reliable Redis queue of ingestion jobs: ids move from `ingest:jobs` to
+    `ingest:jobs:processing` when claimed, and job state lives in `ingest:job:<id>`.
+    Retries wait in the `ingest:jobs:delayed` sorted set, scored by when they are due."""
+
+    QUEUE = "ingest:jobs"
+    PROCESSING = "ingest:jobs:processing"
+    DELAYED = "ingest:jobs:delayed"
+
+    def __init__(self, client: redis.Redis, ttl_seconds: int = 3600 * 24 * 7): # 7-day TTL
+        self.client = client
+        self.ttl = ttl_seconds
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"ingest:job:{job_id}"
+
+    async def enqueue(self, params: Dict[str, Any]) -> str:
+        job_id = str(uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "attempts": 0,
+            "params": params,
+            "progress": {},
+            "timings": {},
+            "created_at": time.time(),
+            "updated_at": time.time(),
+            "result": None,
+            "error": None,
+        }
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job_id), json.dumps(job), ex=self.ttl)
+            pipe.lpush(self.QUEUE, job_id)
+            await pipe.execute()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def update(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        job = await self.get(job_id) or {"job_id": job_id}
+        job.update(fields, updated_at=time.time())
+        await self.client.set(self._key(job_id), json.dumps(job), ex=self.ttl)
+        return job
+
+    async def claim(self, timeout: float = 5.0) -> Optional[str]:
+        return await self.client.blmove(self.QUEUE, self.PROCESSING, timeout, "RIGHT", "LEFT")
+
+    async def release(self, job_id: str, requeue: bool = False, delay: float = 0.0) -> None:
+        """Drops a claimed job from the processing list; `requeue` puts it back in the
+        queue, after `delay` seconds when given (see `promote_due`)."""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.PROCESSING, 1, job_id)
+            if requeue and delay > 0:
+                pipe.zadd(self.DELAYED, {job_id: time.time() + delay})
+            elif requeue:
+                pipe.lpush(self.QUEUE, job_id)
+            await pipe.execute()
+
+    async def promote_due(self) -> int:
+        """Moves delayed jobs whose time has come into the queue."""
+        promoted = 0
+        for job_id in await self.client.zrangebyscore(self.DELAYED, "-inf", time.time()):
+            if await self.client.zrem(self.DELAYED, job_id):  # only the worker that removes it requeues it
+                await self.client.lpush(self.QUEUE, job_id)
+                promoted += 1
+        return promoted
+
+    async def recover_stale(self, stale_after_seconds: float) -> int:
+        """Requeues claimed jobs whose worker stopped reporting progress (e.g. crashed)."""
+        recovered = 0
+        for job_id in await self.client.lrange(self.PROCESSING, 0, -1):
+            job = await self.get(job_id)
+            if job is None:
+                await self.client.lrem(self.PROCESSING, 1, job_id)
+            elif time.time() - job.get("updated_at", 0) > stale_after_seconds:
+                # workers recover concurrently: only the one whose LREM removes the id requeues it
+                if await self.client.lrem(self.PROCESSING, 1, job_id):
+                    await self.update(job_id, status="queued", stage="queued")
+                    await self.client.lpush(self.QUEUE, job_id)
+                    recovered += 1
+        return recovered
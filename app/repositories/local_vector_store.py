@@ -0,0 +1,288 @@
+# In-process vector store: memory-mapped float32 matrix + SQLite payload sidecar, exact search
+from __future__ import annotations
+import asyncio
+import fcntl
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from qdrant_client.models import Filter, MatchAny, MatchValue
+
+from app.core.config import get_settings
+from app.repositories.vector_store import VectorStore
+from app.utils.sparse_embeddings import SparseEmbedding
+
+_SETTINGS = get_settings()
+_MIN_CAPACITY = 1024
+
+
+@dataclass
+class SearchHit:
+    """The parts of a Qdrant ScoredPoint that callers use."""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None
+
+
+def _matches(value: Any, wanted: set) -> bool:
+    if isinstance(value, list):  # like Qdrant: a list payload matches if any element does
+        return any(v in wanted for v in value)
+    return value in wanted
+
+
+class _LocalCollection:
+    """State of one collection directory, shared by every LocalVectorStore that opens it.
+
+    Row i of `vectors.f32` holds the (L2-normalized) vector of the point stored
+    with `row = i` in `payloads.sqlite3`; deleted rows are reused. Single process
+    only: rows and payloads are cached in memory, so the directory is held under an
+    exclusive flock for the life of the process and a second opener fails fast.
+    """
+
+    def __init__(self, path: Path, dim: int):
+        path.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(path / ".lock", "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(
+                f"{path} is in use by another process; VECTOR_BACKEND=local allows one process per directory"
+            ) from None
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path / "payloads.sqlite3"), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)"
+        )
+        stored = self.db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored is None:
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+            self.db.commit()
+        elif int(stored[0]) != dim:
+            raise ValueError(f"{path} holds {stored[0]}-dim vectors, EMBEDDING_DIM is {dim}")
+        self.dim = dim
+
+        self.rows: Dict[str, int] = {}
+        self.ids: Dict[int, str] = {}
+        self.payloads: Dict[int, Dict[str, Any]] = {}
+        for row, pid, payload in self.db.execute("SELECT row, id, payload FROM points"):
+            self.rows[pid], self.ids[row], self.payloads[row] = row, pid, json.loads(payload)
+        self.size = max(self.ids, default=-1) + 1  # rows in use are all < size
+        self.free = sorted(set(range(self.size)) - set(self.ids), reverse=True)
+        self.valid = np.zeros(max(_MIN_CAPACITY, self.size), dtype=bool)
+        self.valid[list(self.ids)] = True
+        self.path = path / "vectors.f32"
+        self.matrix = self._map(len(self.valid))
+
+    def _map(self, capacity: int) -> np.memmap:
+        nbytes = capacity * self.dim * 4
+        with open(self.path, "ab") as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        if self.size == len(self.valid):
+            self.matrix.flush()
+            capacity = len(self.valid) * 2
+            self.valid = np.concatenate([self.valid, np.zeros(capacity - len(self.valid), dtype=bool)])
+            self.matrix = self._map(capacity)
+        self.size += 1
+        return self.size - 1
+
+    def upsert(self, ids: Sequence[str], vectors: Any, payloads: Sequence[Dict[str, Any]]) -> None:
+        arr = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        arr = arr / np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
+        with self.lock:
+            records = []
+            for pid, vec, payload in zip(map(str, ids), arr, payloads):
+                row = self.rows.get(pid)
+                if row is None:
+                    row = self._allocate()
+                    self.rows[pid], self.ids[row] = row, pid
+                self.matrix[row] = vec
+                self.valid[row] = True
+                self.payloads[row] = dict(payload)
+                records.append((row, pid, json.dumps(payload)))
+            self.matrix.flush()
+            self.db.executemany("INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)", records)
+            self.db.commit()
+
+    def delete_rows(self, rows: Iterable[int]) -> None:
+        rows = list(rows)
+        for row in rows:
+            del self.rows[self.ids.pop(row)]
+            self.payloads.pop(row, None)
+            self.valid[row] = False
+            self.free.append(row)
+        self.db.executemany("DELETE FROM points WHERE row = ?", [(r,) for r in rows])
+        self.db.commit()
+
+    def count_points(self, ids: Sequence[str]) -> int:
+        return sum(1 for pid in ids if str(pid) in self.rows)
+
+    def delete_points(self, ids: Sequence[str]) -> None:
+        with self.lock:
+            self.delete_rows([self.rows[str(pid)] for pid in ids if str(pid) in self.rows])
+
+    def rows_where(self, key: str, values: Iterable[Any]) -> List[int]:
+        wanted = set(values)
+        return [row for row, p in self.payloads.items() if _matches(p.get(key), wanted)]
+
+    def delete_by_field(self, key: str, values: Sequence[Any]) -> None:
+        with self.lock:
+            self.delete_rows(self.rows_where(key, values))
+
+    def set_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        with self.lock:
+            records = []
+            for pid, update in payloads.items():
+                row = self.rows.get(str(pid))
+                if row is not None:
+                    self.payloads[row].update(update)
+                    records.append((json.dumps(self.payloads[row]), row))
+            self.db.executemany("UPDATE points SET payload = ? WHERE row = ?", records)
+            self.db.commit()
+
+    def find_vectors_by_field(self, key: str, values: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self.lock:
+            wanted = set(values)
+            for row, p in self.payloads.items():
+                value = p.get(key)
+                if value in wanted and value not in found:
+                    found[value] = self.matrix[row].tolist()
+        return found
+
+    def _filter_mask(self, query_filter: Filter) -> np.ndarray:
+        mask = self.valid[:self.size].copy()
+        for cond in query_filter.must or []:
+            match = cond.match
+            if isinstance(match, MatchValue):
+                wanted = {match.value}
+            elif isinstance(match, MatchAny):
+                wanted = set(match.any)
+            else:
+                raise ValueError(f"Local vector store cannot evaluate {type(match).__name__} filters")
+            allowed = np.zeros(self.size, dtype=bool)
+            allowed[self.rows_where(cond.key, wanted)] = True
+            mask &= allowed
+        return mask
+
+    def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        score_threshold: Optional[float],
+        query_filter: Optional[Filter],
+        with_vectors: bool = False,
+    ) -> List[SearchHit]:
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        with self.lock:
+            if not self.size:
+                return []
+            scores = self.matrix[:self.size] @ q  # cosine: rows are normalized
+            mask = self._filter_mask(query_filter) if query_filter else self.valid[:self.size]
+            scores[~mask] = -np.inf
+            k = min(limit, int(mask.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                SearchHit(
+                    id=self.ids[row], score=float(scores[row]), payload=dict(self.payloads[row]),
+                    vector=self.matrix[row].tolist() if with_vectors else None,
+                )
+                for row in top
+                if score_threshold is None or scores[row] >= score_threshold
+            ]
+
+
+_COLLECTIONS: Dict[Path, _LocalCollection] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def _open(path: Path, dim: int) -> _LocalCollection:
+    with _OPEN_LOCK:
+        if path not in _COLLECTIONS:
+            _COLLECTIONS[path] = _LocalCollection(path, dim)
+        return _COLLECTIONS[path]
+
+
+class LocalVectorStore(VectorStore):
+    """Drop-in VectorStore for small deployments, CI and local dev: exact top-k over a
+    memory-mapped float32 matrix (one matmul + argpartition), no Qdrant server.
+
+    Sparse vectors are not stored and hybrid search runs the dense query only;
+    `search_params` (HNSW/quantization tuning) does not apply to exact search.
+    """
+
+    def __init__(self, collection: str, root: Optional[str] = None, dim: Optional[int] = None, **_qdrant_options: Any):
+        super().__init__(client=None, collection=collection)
+        self.root = Path(root or _SETTINGS.LOCAL_VECTOR_DIR)
+        self.dim = dim or _SETTINGS.EMBEDDING_DIM
+        self._collection: Optional[_LocalCollection] = None
+
+    def _store(self, dim: Optional[int] = None) -> _LocalCollection:
+        if self._collection is None:
+            self._collection = _open((self.root / self.collection).resolve(), dim or self.dim)
+        return self._collection
+
+    async def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+        sparse_vectors: Optional[Sequence[SparseEmbedding]] = None,
+        wait: bool = True,
+    ) -> None:
+        await asyncio.to_thread(self._store().upsert, ids, vectors, payloads)
+
+    async def count_points(self, ids: Sequence[str]) -> int:
+        return self._store().count_points(ids)
+
+    async def set_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._store().set_payloads, payloads)
+
+    async def delete_points(self, ids: Sequence[str]) -> None:
+        await asyncio.to_thread(self._store().delete_points, ids)
+
+    async def delete_by_field(self, key: str, values: Sequence[Any]) -> None:
+        await asyncio.to_thread(self._store().delete_by_field, key, values)
+
+    async def find_vectors_by_field(self, key: str, values: Sequence[str]) -> Dict[str, List[float]]:
+        return await asyncio.to_thread(self._store().find_vectors_by_field, key, values)
+
+    async def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        score_threshold: Optional[float] = None,
+        query_filter: Optional[Filter] = None,
+        with_vectors: bool = False,
+    ) -> List[SearchHit]:
+        return await asyncio.to_thread(self._store().search, vector, limit, score_threshold, query_filter, with_vectors)
+
+    async def hybrid_search(
+        self,
+        vector: Sequence[float],
+        sparse: SparseEmbedding,
+        limit: int,
+        prefetch_limit: int,
+        query_filter: Optional[Filter] = None,
+        with_vectors: bool = False,
+    ) -> List[SearchHit]:
+        return await self.search(vector, limit, query_filter=query_filter, with_vectors=with_vectors)
+
+    async def ensure_collection(self, dim: int, keyword_indexes: Sequence[str] = ()) -> None:
+        await asyncio.to_thread(self._store, dim)
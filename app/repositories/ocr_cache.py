@@ -0,0 +1,29 @@
+from typing import Dict, List, Optional
+import redis.asyncio as redis
+
+
+class OcrCache:
+    """OCR output keyed by PDF page content hash, so re-uploads skip Tesseract."""
+
+    def __init__(self, client: redis.Redis, ttl_seconds: int = 3600 * 24 * 30): # 30-day TTL
+        self.client = client
+        self.ttl = ttl_seconds
+
+    async def get_many(self, hashes: List[str]) -> List[Optional[str]]:
+        if not hashes:
+            return []
+        try:
+            return await self.client.mget([f"ocr:{h}" for h in hashes])
+        except redis.RedisError:
+            return [None] * len(hashes)
+
+    async def put_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for h, text in items.items():
+                    pipe.set(f"ocr:{h}", text, ex=self.ttl)
+                await pipe.execute()
+        except redis.RedisError:
+            pass
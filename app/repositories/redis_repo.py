@@ -1,25 +1,114 @@
 import json
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 import redis.asyncio as redis
+from app.core.config import get_settings
+
+_SETTINGS = get_settings()
+
+
+@dataclass
+class HistoryWindow:
+    """The newest messages of a conversation plus its rolling summary."""
+    messages: List[Dict[str, Any]]  # oldest first
+    first_seq: int  # 1-based sequence number of messages[0] within the conversation
+    summary: Optional[str] = None
+    summary_covered: int = 0  # messages 1..summary_covered are folded into the summary
+
 
 class ChatHistory:
-    def __init__(self, client: redis.Redis, ttl_seconds: int = 3600 * 24 * 7): # 7-day TTL
+    def __init__(self, client: redis.Redis, ttl_seconds: int = 3600 * 24 * 7, max_messages: Optional[int] = None): # 7-day TTL
         self.client = client
         self.ttl = ttl_seconds
+        self.max_messages = max_messages or _SETTINGS.CHAT_HISTORY_MAX_MESSAGES
+
+    @staticmethod
+    def _keys(conversation_id: str) -> Tuple[str, str, str]:
+        # message list, total messages ever added, rolling summary
+        return f"chat:{conversation_id}", f"chat:{conversation_id}:count", f"chat:{conversation_id}:summary"
 
     async def get_messages(self, conversation_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Gets the last N messages from a conversation."""
-        key = f"chat:{conversation_id}"
+        key, _, _ = self._keys(conversation_id)
         try:
-            raw_messages = await self.client.lrange(key, 0, -1)
-            messages = [json.loads(m) for m in raw_messages]
-            return messages[-limit:]
+            raw_messages = await self.client.lrange(key, -limit, -1)
+            return [json.loads(m) for m in raw_messages]
         except (redis.RedisError, IndexError):
             return []
 
-    async def add_message(self, conversation_id: str, role: str, content: str):
-        """Adds a new message to the conversation history."""
-        key = f"chat:{conversation_id}"
-        message = {"role": role, "content": content}
-        await self.client.rpush(key, json.dumps(message))
-        await self.client.expire(key, self.ttl)
\ No newline at end of file
+    async def get_window(self, conversation_id: str, max_messages: int) -> HistoryWindow:
+        """The last `max_messages` messages and the summary, in one round trip."""
+        key, count_key, summary_key = self._keys(conversation_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lrange(key, -max_messages, -1)
+                pipe.llen(key)
+                pipe.get(count_key)
+                pipe.get(summary_key)
+                raw_messages, length, count, summary = await pipe.execute()
+        except redis.RedisError:
+            return HistoryWindow(messages=[], first_seq=1)
+        total = max(int(count or 0), length)  # lists written before the counter existed
+        stored = json.loads(summary) if summary else {}
+        return HistoryWindow(
+            messages=[json.loads(m) for m in raw_messages],
+            first_seq=total - len(raw_messages) + 1,
+            summary=stored.get("text"),
+            summary_covered=int(stored.get("covered", 0)),
+        )
+
+    async def get_range(self, conversation_id: str, first_seq: int, last_seq: int) -> List[Dict[str, Any]]:
+        """Messages `first_seq..last_seq` that are still in the (trimmed) list."""
+        key, count_key, _ = self._keys(conversation_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.llen(key)
+            pipe.get(count_key)
+            length, count = await pipe.execute()
+        offset = max(int(count or 0), length) - length + 1  # seq of the list head
+        start, stop = max(first_seq - offset, 0), last_seq - offset
+        if stop < start:
+            return []
+        return [json.loads(m) for m in await self.client.lrange(key, start, stop)]
+
+    async def add_message(self, conversation_id: str, role: str, content: str, tokens: Optional[int] = None):
+        """Adds a new message to the conversation history; one pipelined round trip that also
+        refreshes the TTLs. Trimming happens in `set_summary`, once messages are summarized."""
+        key, count_key, summary_key = self._keys(conversation_id)
+        message: Dict[str, Any] = {"role": role, "content": content}
+        if tokens is not None:
+            message["tokens"] = tokens
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, json.dumps(message))
+            pipe.incr(count_key)
+            for k in (key, count_key, summary_key):
+                pipe.expire(k, self.ttl)
+            await pipe.execute()
+
+    async def get_summary(self, conversation_id: str) -> Tuple[Optional[str], int]:
+        """(summary text, messages covered)."""
+        _, _, summary_key = self._keys(conversation_id)
+        stored = await self.client.get(summary_key)
+        data = json.loads(stored) if stored else {}
+        return data.get("text"), int(data.get("covered", 0))
+
+    async def set_summary(self, conversation_id: str, text: str, covered: int) -> None:
+        """Stores the summary of messages 1..covered, then trims the list towards `max_messages`
+        by dropping covered messages only; unsummarized ones are never trimmed."""
+        key, count_key, summary_key = self._keys(conversation_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(summary_key, json.dumps({"text": text, "covered": covered}), ex=self.ttl)
+            pipe.llen(key)
+            pipe.get(count_key)
+            _, length, count = await pipe.execute()
+        first_seq = max(int(count or 0), length) - length + 1
+        # trims from the head, so messages appended meanwhile do not shift what is dropped
+        drop = min(length - self.max_messages, covered - first_seq + 1)
+        if drop > 0:
+            await self.client.ltrim(key, drop, -1)
+
+    async def lock_summary(self, conversation_id: str, seconds: int = 120) -> bool:
+        """Claims the summary refresh of a conversation; False if another worker holds it."""
+        return bool(await self.client.set(f"chat:{conversation_id}:summary_lock", "1", nx=True, ex=seconds))
+
+    async def unlock_summary(self, conversation_id: str) -> None:
+        await self.client.delete(f"chat:{conversation_id}:summary_lock")
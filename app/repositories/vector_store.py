@@ -1,24 +1,237 @@
-﻿from typing import Any, Dict, Sequence
+﻿from typing import Any, Dict, List, Optional, Sequence, Union
+import asyncio
+import time
+import numpy as np
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Batch
+from qdrant_client.models import (
+    Batch, Distance, FieldCondition, Filter, FilterSelector, Fusion, FusionQuery, HasIdCondition, MatchAny,
+    MatchValue, PayloadSchemaType, PointStruct, Prefetch, ScoredPoint, SearchParams, SetPayload,
+    SetPayloadOperation, SparseVector, VectorParams,
+)
+
+from app.core.config import get_settings
+from app.utils.sparse_embeddings import SparseEmbedding
+
+_SETTINGS = get_settings()
+
+
+def match_filter(conditions: Dict[str, Any]) -> Optional[Filter]:
+    """Filter requiring every payload key to equal its value (or any value of a list)."""
+    must = [
+        FieldCondition(key=key, match=MatchAny(any=list(value)) if isinstance(value, (list, tuple)) else MatchValue(value=value))
+        for key, value in conditions.items()
+    ]
+    return Filter(must=must) if must else None
+
+
+def dense_vector(point: Any) -> Optional[List[float]]:
+    """The dense vector of a point fetched with vectors; collections with a sparse
+    vector return {"": dense, name: sparse}."""
+    return point.vector.get("") if isinstance(point.vector, dict) else point.vector
 
 
 class VectorStore:
-    def __init__(self, client: AsyncQdrantClient, collection: str):
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection: str,
+        sparse_vector_name: str = "bm25",
+        search_params: Optional[SearchParams] = None,
+    ):
         self.client = client
         self.collection = collection
+        self.sparse_vector_name = sparse_vector_name  # named sparse vector next to the unnamed dense one
+        self.search_params = search_params  # hnsw_ef / quantization rescoring for dense queries
 
     async def upsert(
         self,
         ids: Sequence[str],
-        vectors: Sequence[Sequence[float]],
+        vectors: Union[np.ndarray, Sequence[Sequence[float]]],
         payloads: Sequence[Dict[str, Any]],
+        sparse_vectors: Optional[Sequence[SparseEmbedding]] = None,
+        wait: bool = True,
     ) -> None:
-        batch = Batch(ids=list(ids), vectors=list(vectors), payloads=list(payloads))
-        await self.client.upsert(collection_name=self.collection, points=batch)
+        # float32 arrays are converted once, here, at the client boundary
+        vectors = vectors.tolist() if isinstance(vectors, np.ndarray) else list(vectors)
+        if sparse_vectors is None:
+            batch = Batch(ids=list(ids), vectors=vectors, payloads=list(payloads))
+            await self.client.upsert(collection_name=self.collection, points=batch, wait=wait)
+            return
+        points = [
+            PointStruct(
+                id=pid,
+                vector={"": vec, self.sparse_vector_name: SparseVector(indices=sp.indices, values=sp.values)},
+                payload=payload,
+            )
+            for pid, vec, sp, payload in zip(ids, vectors, sparse_vectors, payloads)
+        ]
+        await self.client.upsert(collection_name=self.collection, points=points, wait=wait)
+
+    async def upsert_many(
+        self,
+        ids: Sequence[str],
+        vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+        payloads: Sequence[Dict[str, Any]],
+        sparse_vectors: Optional[Sequence[SparseEmbedding]] = None,
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = False,
+    ) -> None:
+        """Upserts in `batch_size` slices with up to `parallelism` requests in flight.
+
+        With `wait=False` Qdrant acknowledges each slice once it is in the WAL; call
+        `confirm_points` before relying on the points being searchable."""
+        batch_size = batch_size or _SETTINGS.QDRANT_UPSERT_BATCH_SIZE
+        limit = asyncio.Semaphore(parallelism or _SETTINGS.QDRANT_UPSERT_PARALLELISM)
+
+        async def _send(i: int) -> None:
+            j = i + batch_size
+            async with limit:
+                await self.upsert(
+                    ids[i:j], vectors[i:j], payloads[i:j],
+                    sparse_vectors[i:j] if sparse_vectors is not None else None, wait=wait,
+                )
+
+        await asyncio.gather(*(_send(i) for i in range(0, len(ids), batch_size)))
+
+    async def count_points(self, ids: Sequence[str]) -> int:
+        """How many of `ids` are stored (exact count)."""
+        result = await self.client.count(
+            collection_name=self.collection,
+            count_filter=Filter(must=[HasIdCondition(has_id=list(ids))]),
+            exact=True,
+        )
+        return result.count
+
+    async def confirm_points(self, ids: Sequence[str], timeout: Optional[float] = None) -> None:
+        """Waits until every point of `ids` is applied; raises RuntimeError after `timeout` seconds."""
+        if not ids:
+            return
+        deadline = time.monotonic() + (timeout if timeout is not None else _SETTINGS.QDRANT_UPSERT_CONFIRM_TIMEOUT_SECONDS)
+        delay = 0.05
+        while (found := await self.count_points(ids)) < len(ids):
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"only {found} of {len(ids)} upserted points are present in '{self.collection}'")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
 
     async def delete_points(self, ids: Sequence[str]) -> None:
         await self.client.delete(
             collection_name=self.collection,
             points_selector={"points": list(ids)}
         )
+
+    async def set_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Merges a per-point payload into each point, in one request."""
+        await self.client.batch_update_points(
+            collection_name=self.collection,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[pid]))
+                for pid, payload in payloads.items()
+            ],
+        )
+
+    async def delete_by_field(self, key: str, values: Sequence[Any]) -> None:
+        """Deletes every point whose payload `key` matches any of `values`."""
+        await self.client.delete(
+            collection_name=self.collection,
+            points_selector=FilterSelector(
+                filter=Filter(must=[FieldCondition(key=key, match=MatchAny(any=list(values)))])
+            ),
+        )
+
+    async def find_vectors_by_field(self, key: str, values: Sequence[str]) -> Dict[str, List[float]]:
+        """Maps each of `values` to the vector of one point whose payload `key` equals it."""
+        wanted = set(values)
+        found: Dict[str, List[float]] = {}
+        offset = None
+        while wanted - found.keys():
+            points, offset = await self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=Filter(must=[FieldCondition(key=key, match=MatchAny(any=list(wanted - found.keys())))]),
+                limit=max(64, len(wanted)),
+                offset=offset,
+                with_payload=[key],
+                with_vectors=True,
+            )
+            for p in points:
+                value = (p.payload or {}).get(key)
+                if value in wanted and value not in found:
+                    found[value] = dense_vector(p)
+            if offset is None:
+                break
+        return found
+
+    async def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        score_threshold: Optional[float] = None,
+        query_filter: Optional[Filter] = None,
+        with_vectors: bool = False,
+    ) -> List[ScoredPoint]:
+        return await self.client.search(
+            collection_name=self.collection,
+            query_vector=list(vector),
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            search_params=self.search_params,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+
+    async def hybrid_search(
+        self,
+        vector: Sequence[float],
+        sparse: SparseEmbedding,
+        limit: int,
+        prefetch_limit: int,
+        query_filter: Optional[Filter] = None,
+        with_vectors: bool = False,
+    ) -> List[ScoredPoint]:
+        """Dense and sparse candidates fetched and fused (RRF) by Qdrant in one request."""
+        response = await self.client.query_points(
+            collection_name=self.collection,
+            prefetch=[
+                Prefetch(query=list(vector), limit=prefetch_limit, filter=query_filter, params=self.search_params),
+                Prefetch(
+                    query=SparseVector(indices=sparse.indices, values=sparse.values),
+                    using=self.sparse_vector_name,
+                    limit=prefetch_limit,
+                    filter=query_filter,
+                ),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        return response.points
+
+    async def ensure_collection(self, dim: int, keyword_indexes: Sequence[str] = ()) -> None:
+        if await self.client.collection_exists(self.collection):
+            return
+        await self.client.create_collection(
+            collection_name=self.collection,
+            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+        )
+        for field in keyword_indexes:
+            await self.client.create_payload_index(
+                collection_name=self.collection, field_name=field, field_schema=PayloadSchemaType.KEYWORD
+            )
+
+
+def create_qdrant_client() -> AsyncQdrantClient:
+    """Qdrant client from settings; with QDRANT_PREFER_GRPC, vectors travel as packed protobuf floats."""
+    return AsyncQdrantClient(
+        url=_SETTINGS.QDRANT_URL, prefer_grpc=_SETTINGS.QDRANT_PREFER_GRPC, grpc_port=_SETTINGS.QDRANT_GRPC_PORT
+    )
+
+
+def create_vector_store(client: AsyncQdrantClient, collection: str, **options: Any) -> VectorStore:
+    """VectorStore for the configured backend (VECTOR_BACKEND); `options` are Qdrant-only tuning."""
+    if _SETTINGS.VECTOR_BACKEND == "local":
+        from app.repositories.local_vector_store import LocalVectorStore
+        return LocalVectorStore(collection)
+    return VectorStore(client=client, collection=collection, **options)
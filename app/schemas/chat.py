@@ -1,11 +1,25 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field
 from .booking import BookingResponse
 
+FilterValue = Union[bool, int, str, List[Union[int, str]]]  # a list matches any of its values
+
+class RetrievalFilter(BaseModel):
+    doc_id: Optional[Union[str, List[str]]] = None
+    filename: Optional[Union[str, List[str]]] = None
+    mime_type: Optional[Union[str, List[str]]] = None
+    metadata: Dict[str, FilterValue] = Field(default_factory=dict)  # keys must be in INDEXED_PAYLOAD_FIELDS
+
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
     retrieval_k: int = 4
+    retrieval_mode: Optional[Literal["dense", "hybrid"]] = None  # hybrid = dense + BM25 fused with RRF; default from settings
+    rerank: Optional[bool] = None  # cross-encoder rerank; defaults to on when RERANK_MODEL is set
+    filters: Optional[RetrievalFilter] = None
+    mmr: Optional[bool] = None  # diversify the top k with Maximal Marginal Relevance; default MMR_ENABLED
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0)  # 1 = relevance only, 0 = diversity only
+    mmr_fetch_k: Optional[int] = Field(default=None, ge=1, le=200)  # candidates to choose from
 
 class Citation(BaseModel):
     doc_id: str
@@ -1,4 +1,4 @@
-from typing import Literal, Optional
+from typing import Any, Dict, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -12,4 +12,38 @@ class IngestResponse(BaseModel):
     embedding_model: str
     vector_collection: str
     used_ocr: bool
-    skipped_duplicate: bool = Field(default=False)
\ No newline at end of file
+    pages_digital: int = 0
+    pages_ocr: int = 0
+    embeddings_reused: int = 0  # chunks that were not embedded: identical content already stored
+    embedding_reuse_rate: float = 0.0
+    previous_version: bool = False  # True when this replaced an earlier version of the same document
+    chunks_added: int = 0
+    chunks_unchanged: int = 0
+    chunks_removed: int = 0
+    skipped_duplicate: bool = Field(default=False)
+
+
+class DeleteResponse(BaseModel):
+    document_id: str
+    chunks: int
+
+
+class IngestJobAccepted(BaseModel):
+    job_id: str
+    status: str = "queued"
+    status_url: str
+
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    stage: str
+    attempts: int = 0
+    progress: Dict[str, Any] = Field(default_factory=dict)  # pages, chunks, chunks_embedded, ...
+    timings: Dict[str, float] = Field(default_factory=dict)
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    not_before: Optional[float] = None  # a queued retry is not picked up before this time
+    result: Optional[IngestResponse] = None
+    error: Optional[str] = None
@@ -1,27 +1,109 @@
 #orchestration ingestion pipeline
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import json
-from typing import Dict, List, Literal, Optional, Tuple
+import logging
+import os
+import tempfile
+import time
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import HTTPException, UploadFile, status
-from sqlalchemy import text as sql_text, select, func
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import bindparam, text as sql_text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.utils.text_extraction import extract_text_from_file
-from app.utils.chunking import chunk_fixed_tokens, chunk_semantic
+from app.core.metrics import METRICS
+from app.utils.text_extraction import detect_kind
+from app.utils.extraction_pool import ExtractionPool, PoolSaturated
+from app.utils.chunking import StreamingChunker
 from app.utils.embeddings import EmbeddingClient
+from app.utils.embedding_cache import embedding_cache_key
+from app.utils.sparse_embeddings import SparseEmbedding, SparseEmbeddingClient
 from app.repositories.vector_store import VectorStore
-from app.schemas.ingest import IngestResponse
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.schemas.ingest import DeleteResponse, IngestResponse
 
 _SETTINGS = get_settings()
+_log = logging.getLogger(__name__)
+_SPOOL_BLOCK_BYTES = 1 << 20
+_DONE = object()  # end-of-stream marker between pipeline stages
 
 
-def _sha256(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+async def spool_upload(file: UploadFile, spool_dir: Optional[str] = None) -> Tuple[str, str, int]:
+    """Streams an upload to a temp file, hashing it on the way. Returns (path, sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="ingest-", dir=spool_dir or _SETTINGS.INGEST_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while block := await file.read(_SPOOL_BLOCK_BYTES):
+                digest.update(block)
+                size += len(block)
+                await asyncio.to_thread(out.write, block)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+@dataclass
+class _Chunk:
+    id: str
+    index: int
+    text: str
+    token_count: int
+    hash: str = ""  # sha256(embedding model, normalized text): content address of the vector
+
+
+@dataclass
+class IngestProgress:
+    stage: str = "extracting"
+    pages: int = 0
+    pages_ocr: int = 0
+    chars: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0  # vectors copied from identical chunks already in the collection
+    chunks_unchanged: int = 0  # re-ingest only: chunks kept from the previous version
+    chunks_removed: int = 0  # re-ingest only: chunks of the previous version that are gone
+    chunks_written: int = 0
+    started_at: float = field(default_factory=time.time)
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> seconds from start until it finished
+
+    def finish_stage(self, stage: str, next_stage: str) -> None:
+        self.timings[stage] = round(time.time() - self.started_at, 3)
+        self.stage = next_stage
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _EmbeddedBatch:
+    vectors: np.ndarray  # (len(batch), EMBEDDING_DIM) float32
+    reused: set
+    sparse: Optional[List[SparseEmbedding]] = None
+
+
+ProgressCallback = Callable[[IngestProgress], Awaitable[None]]
+
+
+async def _run_stages(*stages: Awaitable[None]) -> None:
+    """Runs pipeline stages concurrently; the first failure cancels the rest."""
+    tasks = [asyncio.ensure_future(s) for s in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 class IngestionService:
@@ -30,10 +112,24 @@ class IngestionService:
         vector_store: VectorStore,
         embedder: EmbeddingClient,
         session: AsyncSession,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        extraction_pool: Optional[ExtractionPool] = None,
+        sparse_embedder: Optional[SparseEmbeddingClient] = None,
     ):
         self.vector_store = vector_store
         self.embedder = embedder
         self.session = session
+        self.answer_cache = answer_cache
+        self.extraction_pool = extraction_pool or ExtractionPool(use_processes=False)
+        self.sparse_embedder = sparse_embedder
+
+    async def _invalidate_answers(self, doc_id: str) -> None:
+        if self.answer_cache is None:
+            return
+        try:
+            await self.answer_cache.invalidate_documents([doc_id])
+        except Exception:
+            pass
 
     async def ingest(
         self,
@@ -43,13 +139,50 @@ class IngestionService:
         overlap: int = 50,
         use_ocr: bool = True,
         extra_metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None,
+        source_uri: Optional[str] = None,
     ) -> IngestResponse:
-        data = await file.read()
-        if not data:
-            raise HTTPException(status_code=400, detail="Empty file")
+        path, checksum, size = await spool_upload(file)
+        try:
+            if not size:
+                raise HTTPException(status_code=400, detail="Empty file")
+            return await self.ingest_path(
+                path,
+                filename=file.filename or "",
+                content_type=file.content_type,
+                checksum=checksum,
+                chunk_strategy=chunk_strategy,
+                chunk_size=chunk_size,
+                overlap=overlap,
+                use_ocr=use_ocr,
+                extra_metadata=extra_metadata,
+                document_id=document_id,
+                source_uri=source_uri,
+            )
+        finally:
+            os.unlink(path)
 
-        checksum = _sha256(data)
+    async def ingest_path(
+        self,
+        path: str,
+        filename: str,
+        content_type: Optional[str],
+        checksum: str,
+        chunk_strategy: Literal["fixed", "semantic"] = "semantic",
+        chunk_size: int = 500,
+        overlap: int = 50,
+        use_ocr: bool = True,
+        extra_metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None,
+        source_uri: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> IngestResponse:
+        """Ingests an already-spooled file. Extraction, chunking, embedding and writes run
+        as concurrent stages joined by bounded queues, so memory stays flat in file size.
 
+        When `document_id` is given, or `source_uri` matches a stored document, the file is
+        ingested as a new version of that document: chunks whose content is unchanged keep
+        their rows and vectors, and only added chunks are embedded and written."""
         # Idempotency: check if document already exists
         doc_row = await self.session.execute(
             sql_text("SELECT id FROM documents WHERE checksum = :ck LIMIT 1"),
@@ -73,121 +206,369 @@ class IngestionService:
                 skipped_duplicate=True,
             )
 
-        # Extract text
+        previous_id = await self._find_previous_version(document_id, source_uri)
+        doc_id = previous_id or str(uuid4())
+        # content hash -> [(chunk id, chunk_index)] of the previous version, matched in order
+        previous = await self._load_chunk_hashes(previous_id) if previous_id else {}
+        moved: Dict[str, int] = {}  # kept chunk id -> new chunk_index
+        added_ids: List[str] = []  # points written by this ingest
+        is_pdf = detect_kind(filename, content_type) == "pdf"
+        stats = IngestProgress()
+        last_report = 0.0
+
+        async def report(force: bool = False) -> None:
+            nonlocal last_report
+            if on_progress is not None and (force or time.monotonic() - last_report >= 0.5):
+                last_report = time.monotonic()
+                await on_progress(stats)
+
+        batch_size = _SETTINGS.INGEST_EMBED_BATCH_SIZE
+        chunk_q: asyncio.Queue = asyncio.Queue(maxsize=batch_size * _SETTINGS.INGEST_QUEUE_BATCHES)
+        vector_q: asyncio.Queue = asyncio.Queue(maxsize=_SETTINGS.INGEST_QUEUE_BATCHES)
+
+        async def extract_and_chunk() -> None:
+            chunker = StreamingChunker(chunk_strategy, chunk_size=chunk_size, overlap=overlap)
+
+            async def emit(pieces: List[Tuple[str, int]]) -> None:
+                for chunk_text, tok_count in pieces:
+                    index, content_hash = stats.chunks, embedding_cache_key(self.embedder.model, chunk_text)
+                    stats.chunks += 1
+                    if previous.get(content_hash):
+                        kept_id, old_index = previous[content_hash].pop(0)
+                        if old_index != index:
+                            moved[kept_id] = index
+                        stats.chunks_unchanged += 1
+                        continue
+                    await chunk_q.put(_Chunk(str(uuid4()), index, chunk_text, tok_count, hash=content_hash))
+
+            try:
+                # aclosing: a cancelled stage releases the pool slot now, not when the generator is collected
+                async with aclosing(self.extraction_pool.iter_pages(path, filename, content_type, use_ocr=use_ocr)) as pages:
+                    async for page in pages:
+                        stats.pages += 1
+                        stats.pages_ocr += page.used_ocr
+                        stats.chars += len(page.text)
+                        await emit(chunker.feed(page.text + "\n\n" if is_pdf else page.text))
+                        await report()
+            except PoolSaturated as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+            except RuntimeError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            await emit(chunker.flush())
+            # unusable input fails here, before the embed and write stages do any work
+            if stats.chars < 10:
+                raise HTTPException(status_code=422, detail="Failed to extract text")
+            if not stats.chunks:
+                raise HTTPException(status_code=422, detail="No chunks produced")
+            await chunk_q.put(_DONE)
+            stats.finish_stage("extracting", "embedding")
+            await report(force=True)
+
+        async def embed() -> None:
+            done = False
+            while not done:
+                batch: List[_Chunk] = []
+                while len(batch) < batch_size:
+                    item = await chunk_q.get()
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    continue
+                embedded = await self._embed_batch(batch)
+                stats.chunks_reused += sum(1 for c in batch if c.hash in embedded.reused)
+                stats.chunks_embedded += len(batch)
+                await report()
+                await vector_q.put((batch, embedded.vectors, embedded.sparse))
+            await vector_q.put(_DONE)
+            stats.finish_stage("embedding", "writing")
+            await report(force=True)
+
+        async def write() -> None:
+            # Qdrant upserts run in the background (wait=false, bounded in flight) while
+            # the chunk rows of the same batch go to MySQL; all are confirmed at the end
+            in_flight = asyncio.Semaphore(_SETTINGS.QDRANT_UPSERT_PARALLELISM)
+            upserts: List[asyncio.Task] = []
+
+            async def upsert(batch: List[_Chunk], vectors: np.ndarray, sparse: Optional[List[SparseEmbedding]]) -> None:
+                try:
+                    await self.vector_store.upsert_many(
+                        ids=[c.id for c in batch],
+                        vectors=vectors,
+                        payloads=self._payloads(doc_id, filename, content_type, extra_metadata, batch),
+                        sparse_vectors=sparse,
+                        wait=False,
+                    )
+                finally:
+                    in_flight.release()
+
+            try:
+                while (item := await vector_q.get()) is not _DONE:
+                    batch, vectors, sparse = item
+                    added_ids.extend(c.id for c in batch)
+                    await in_flight.acquire()
+                    upserts.append(asyncio.create_task(upsert(batch, vectors, sparse)))
+                    await self._insert_chunk_rows(doc_id, batch)
+                    stats.chunks_written += len(batch)
+                    await report()
+                    failed = next((t for t in upserts if t.done() and t.exception()), None)
+                    if failed is not None:
+                        await failed
+                await asyncio.gather(*upserts)
+                await self.vector_store.confirm_points(added_ids)
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=502, detail=f"Vector store error: {e}")
+            finally:
+                # let every accepted upsert land before an abort deletes the document's points
+                await asyncio.gather(*upserts, return_exceptions=True)
+            stats.finish_stage("writing", "committing")
+            await report(force=True)
+
+        # Document row first (chunk rows reference it); committed only once every stage succeeded
+        doc_params = {
+            "id": doc_id,
+            "title": filename or None,
+            "src": source_uri,
+            "mime": content_type or None,
+            "ck": checksum,
+        }
         try:
-            text, used_ocr = extract_text_from_file(
-                filename=file.filename or "",
-                content_type=file.content_type,
-                data=data,
-                use_ocr=use_ocr,
+            if previous_id:
+                await self.session.execute(
+                    sql_text(
+                        "UPDATE documents SET title = :title, source_uri = COALESCE(:src, source_uri), "
+                        "mime_type = :mime, checksum = :ck WHERE id = :id"
+                    ),
+                    doc_params,
+                )
+            else:
+                await self.session.execute(
+                    sql_text(
+                        "INSERT INTO documents (id, title, source_uri, mime_type, checksum) "
+                        "VALUES (:id, :title, :src, :mime, :ck)"
+                    ),
+                    doc_params,
+                )
+            await _run_stages(extract_and_chunk(), embed(), write())
+            removed = [cid for entries in previous.values() for cid, _ in entries]
+            stats.chunks_removed = len(removed)
+            if previous_id:
+                await self._apply_version_diff(moved, removed)
+            await self.session.commit()
+        except BaseException as e:
+            # A new version must not take the previous one down with it: only drop what it wrote
+            await self._abort(doc_id, point_ids=added_ids if previous_id else None)
+            if isinstance(e, Exception) and not isinstance(e, HTTPException):
+                raise HTTPException(status_code=500, detail=f"DB error: {e}")
+            raise
+
+        if previous_id:
+            await self._sync_version_vectors(doc_id, moved, removed)
+        stats.finish_stage("committing", "completed")
+        await report(force=True)
+        reused = stats.chunks_reused + stats.chunks_unchanged
+        METRICS.inc("ingest.chunks_embedded", stats.chunks - reused)
+        METRICS.inc("ingest.chunks_reused", reused)
+        await self._invalidate_answers(doc_id)
+
+        return IngestResponse(
+            document_id=doc_id,
+            chunks=stats.chunks,
+            chunk_strategy=chunk_strategy,
+            embedding_model=_SETTINGS.EMBEDDING_MODEL,
+            vector_collection=_SETTINGS.QDRANT_COLLECTION,
+            used_ocr=stats.pages_ocr > 0,
+            pages_digital=stats.pages - stats.pages_ocr if is_pdf else 0,
+            pages_ocr=stats.pages_ocr,
+            embeddings_reused=reused,
+            embedding_reuse_rate=round(reused / stats.chunks, 4),
+            previous_version=previous_id is not None,
+            chunks_added=stats.chunks - stats.chunks_unchanged,
+            chunks_unchanged=stats.chunks_unchanged,
+            chunks_removed=stats.chunks_removed,
+            skipped_duplicate=False,
+        )
+
+    async def _find_previous_version(self, document_id: Optional[str], source_uri: Optional[str]) -> Optional[str]:
+        if document_id:
+            row = await self.session.execute(
+                sql_text("SELECT id FROM documents WHERE id = :id"), {"id": document_id}
+            )
+            if row.first() is None:
+                raise HTTPException(status_code=404, detail="Document not found")
+            return document_id
+        if source_uri:
+            row = await self.session.execute(
+                sql_text("SELECT id FROM documents WHERE source_uri = :src ORDER BY created_at DESC LIMIT 1"),
+                {"src": source_uri},
+            )
+            found = row.first()
+            return found[0] if found else None
+        return None
+
+    async def _load_chunk_hashes(self, doc_id: str) -> Dict[str, List[Tuple[str, int]]]:
+        rows = await self.session.execute(
+            sql_text("SELECT id, chunk_index, content_hash FROM chunks WHERE doc_id = :doc ORDER BY chunk_index"),
+            {"doc": doc_id},
+        )
+        hashes: Dict[str, List[Tuple[str, int]]] = {}
+        for cid, index, content_hash in rows:
+            # rows written before content hashes were recorded never match, so they are replaced
+            hashes.setdefault(content_hash or f"legacy:{cid}", []).append((cid, index))
+        return hashes
+
+    async def _apply_version_diff(self, moved: Dict[str, int], removed: List[str]) -> None:
+        """Renumbers kept chunks and drops removed ones in MySQL (uncommitted). Qdrant is
+        brought in line by `_sync_version_vectors` only after the commit."""
+        if moved:
+            await self.session.execute(
+                sql_text("UPDATE chunks SET chunk_index = :idx WHERE id = :id"),
+                [{"id": cid, "idx": idx} for cid, idx in moved.items()],
             )
-        except RuntimeError as e:
-            raise HTTPException(status_code=422, detail=str(e))
-        if not text or len(text) < 10:
-            raise HTTPException(status_code=422, detail="Failed to extract text")
-
-        # Chunk
-        if chunk_strategy == "fixed":
-            chunks = chunk_fixed_tokens(text, chunk_size=chunk_size, overlap=overlap)
-        else:
-            chunks = chunk_semantic(text, max_tokens=chunk_size, overlap_sentences=max(0, overlap // 50))
-        # chunks: List[Tuple[text, token_count]]
-
-        if not chunks:
-            raise HTTPException(status_code=422, detail="No chunks produced")
-
-        doc_id = str(uuid4())
-        chunk_ids: List[str] = []
-        payloads: List[Dict] = []
-        texts: List[str] = []
-
-        for idx, (chunk_text, tok_count) in enumerate(chunks):
-            cid = str(uuid4())
-            chunk_ids.append(cid)
-            texts.append(chunk_text)
+        if removed:
+            await self.session.execute(
+                sql_text("DELETE FROM chunks WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": removed},
+            )
+
+    async def _sync_version_vectors(self, doc_id: str, moved: Dict[str, int], removed: List[str]) -> None:
+        """Post-commit: renumbers kept points and deletes removed ones in Qdrant. Both are
+        idempotent and safe to retry; a failure leaves stale points carrying the document's id
+        (dropped with it by `delete_document`) and is logged and counted, not returned as an
+        error for an ingest that is already committed."""
+        try:
+            if moved:
+                await self.vector_store.set_payloads({cid: {"chunk_index": idx} for cid, idx in moved.items()})
+            if removed:
+                await self.vector_store.delete_points(removed)
+        except Exception:
+            METRICS.inc("ingest.version_sync_failed")
+            _log.exception(
+                "Vector store sync failed for document %s (%d moved, %d removed)", doc_id, len(moved), len(removed)
+            )
+
+    async def _embed_batch(self, batch: List[_Chunk]) -> _EmbeddedBatch:
+        """Embeds a batch, reusing stored vectors of chunks with identical content."""
+        try:
+            reused = await self.vector_store.find_vectors_by_field("chunk_hash", list({c.hash for c in batch}))
+        except Exception:
+            reused = {}  # reuse is an optimization only
+        misses = list({c.hash: c.text for c in batch if c.hash not in reused}.items())
+        fresh = np.empty((0, _SETTINGS.EMBEDDING_DIM), dtype=np.float32)
+        if misses:
+            try:
+                fresh = await self.embedder.embed_array([text for _, text in misses])
+            except Exception as e:
+                raise HTTPException(
+                    status_code=502, detail=f"Embedding provider error: {e}"
+                )
+            # Sanity check on vector dim
+            if fresh.ndim != 2 or fresh.shape[1] != _SETTINGS.EMBEDDING_DIM:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Embedding dimension mismatch. Expected {_SETTINGS.EMBEDDING_DIM}, got {fresh.shape[-1]}",
+                )
+        # float32 rows stay in one contiguous array down to VectorStore.upsert
+        miss_row = {h: i for i, (h, _) in enumerate(misses)}
+        vectors = np.empty((len(batch), _SETTINGS.EMBEDDING_DIM), dtype=np.float32)
+        for i, c in enumerate(batch):
+            vectors[i] = reused[c.hash] if c.hash in reused else fresh[miss_row[c.hash]]
+        sparse = None
+        if self.sparse_embedder is not None:
+            # cheap term counting, so never reused
+            try:
+                sparse = await self.sparse_embedder.embed_documents([c.text for c in batch])
+            except Exception as e:
+                raise HTTPException(status_code=502, detail=f"Sparse embedding error: {e}")
+        return _EmbeddedBatch(
+            vectors=vectors,
+            reused=set(reused),
+            sparse=sparse,
+        )
+
+    @staticmethod
+    def _payloads(
+        doc_id: str,
+        filename: str,
+        content_type: Optional[str],
+        extra_metadata: Optional[Dict],
+        batch: List[_Chunk],
+    ) -> List[Dict[str, Any]]:
+        payloads: List[Dict[str, Any]] = []
+        for c in batch:
             payload = {
                 "doc_id": doc_id,
-                "chunk_index": idx,
-                "filename": file.filename,
-                "token_count": tok_count,
-                "mime_type": file.content_type,
-                "source": file.filename,
-                "text": chunk_text,
-               
+                "chunk_index": c.index,
+                "filename": filename,
+                "token_count": c.token_count,
+                "mime_type": content_type,
+                "source": filename,
+                "text": c.text,
+                "chunk_hash": c.hash,
             }
             if extra_metadata:
                 payload.update(extra_metadata)
             payloads.append(payload)
+        return payloads
 
-        # Embed
-        try:
-            vectors = await self.embedder.embed_texts(texts)
-        except Exception as e:
-            raise HTTPException(
-                status_code=502, detail=f"Embedding provider error: {e}"
-            )
-
-        # Sanity check on vector dim
-        if not vectors or len(vectors[0]) != _SETTINGS.EMBEDDING_DIM:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Embedding dimension mismatch. Expected {_SETTINGS.EMBEDDING_DIM}, got {len(vectors[0]) if vectors else 'None'}",
-            )
+    async def _insert_chunk_rows(self, doc_id: str, batch: List[_Chunk]) -> None:
+        # one executemany, which the MySQL driver sends as a multi-row INSERT
+        await self.session.execute(
+            sql_text(
+                "INSERT INTO chunks (id, doc_id, chunk_index, page_start, page_end, heading, token_count, vector_id, content_hash) "
+                "VALUES (:id, :doc_id, :chunk_index, NULL, NULL, NULL, :token_count, :vector_id, :content_hash)"
+            ),
+            [
+                {
+                    "id": c.id,
+                    "doc_id": doc_id,
+                    "chunk_index": c.index,
+                    "token_count": c.token_count,
+                    "vector_id": c.id,
+                    "content_hash": c.hash,
+                }
+                for c in batch
+            ],
+        )
 
-        # Upsert to Qdrant first
+    async def _abort(self, doc_id: str, point_ids: Optional[List[str]] = None) -> None:
+        """Rolls back the MySQL transaction and removes the vectors already written:
+        every point of `doc_id`, or only `point_ids` when given."""
         try:
-            await self.vector_store.upsert(ids=chunk_ids, vectors=vectors, payloads=payloads)
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Vector store error: {e}")
-
-        # Write to MySQL in a transaction; if it fails, attempt to delete vectors
+            await self.session.rollback()
+        except Exception:
+            pass
         try:
-            await self.session.execute(
-                sql_text(
-                    "INSERT INTO documents (id, title, source_uri, mime_type, checksum) "
-                    "VALUES (:id, :title, :src, :mime, :ck)"
-                ),
-                {
-                    "id": doc_id,
-                    "title": file.filename or None,
-                    "src": None,
-                    "mime": file.content_type or None,
-                    "ck": checksum,
-                },
-            )
+            if point_ids is None:
+                await self.vector_store.delete_by_field("doc_id", [doc_id])
+            elif point_ids:
+                await self.vector_store.delete_points(point_ids)
+        except Exception:
+            pass
 
-            # Bulk insert chunks
-            values_sql = (
-                "INSERT INTO chunks (id, doc_id, chunk_index, page_start, page_end, heading, token_count, vector_id) "
-                "VALUES (:id, :doc_id, :chunk_index, NULL, NULL, NULL, :token_count, :vector_id)"
-            )
-            for idx, (cid, (_txt, tok)) in enumerate(zip(chunk_ids, chunks)):
-                await self.session.execute(
-                    sql_text(values_sql),
-                    {
-                        "id": cid,
-                        "doc_id": doc_id,
-                        "chunk_index": idx,
-                        "token_count": tok,
-                        "vector_id": cid,
-                    },
-                )
+    async def delete_document(self, doc_id: str) -> DeleteResponse:
+        cnt_row = await self.session.execute(
+            sql_text("SELECT COUNT(*) FROM chunks WHERE doc_id = :doc"),
+            {"doc": doc_id},
+        )
+        chunks_count = int(cnt_row.scalar() or 0)
+        result = await self.session.execute(
+            sql_text("DELETE FROM documents WHERE id = :doc"),  # chunks cascade
+            {"doc": doc_id},
+        )
+        if not result.rowcount:
+            await self.session.rollback()
+            raise HTTPException(status_code=404, detail="Document not found")
 
-            await self.session.commit()
+        try:
+            await self.vector_store.delete_by_field("doc_id", [doc_id])
         except Exception as e:
             await self.session.rollback()
-            try:
-                await self.vector_store.delete_points(ids=chunk_ids)
-            except Exception:
-                pass
-            raise HTTPException(status_code=500, detail=f"DB error: {e}")
+            raise HTTPException(status_code=502, detail=f"Vector store error: {e}")
+        await self.session.commit()
 
-        return IngestResponse(
-            document_id=doc_id,
-            chunks=len(chunks),
-            chunk_strategy=chunk_strategy,
-            embedding_model=_SETTINGS.EMBEDDING_MODEL,
-            vector_collection=_SETTINGS.QDRANT_COLLECTION,
-            used_ocr=used_ocr,
-            skipped_duplicate=False,
-        )
\ No newline at end of file
+        await self._invalidate_answers(doc_id)
+        return DeleteResponse(document_id=doc_id, chunks=chunks_count)
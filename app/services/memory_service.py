@@ -0,0 +1,143 @@
+# Token-budgeted conversation memory: a window of recent turns plus a rolling summary of older ones
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.repositories.redis_repo import ChatHistory
+from app.utils.chunking import count_tokens
+from app.utils.llm import LLMClient
+
+_SETTINGS = get_settings()
+
+# summary refreshes outlive the request that scheduled them
+_REFRESHES: Set[asyncio.Task] = set()
+
+
+@dataclass
+class MemoryContext:
+    """What the LLM sees of a conversation: the summary of older turns and the recent window."""
+    summary: Optional[str]
+    messages: List[Dict[str, str]]  # role/content, oldest first; the last one is the current message
+    omitted: int = 0  # unsummarized messages between the summary and the window, over the hard cap
+
+    @property
+    def is_first_turn(self) -> bool:
+        return len(self.messages) <= 1 and not self.summary and not self.omitted
+
+    def as_messages(self) -> List[Dict[str, str]]:
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        if self.omitted:
+            parts.append(f"({self.omitted} earlier messages are not shown.)")
+        if not parts:
+            return list(self.messages)
+        return [{"role": "system", "content": "\n\n".join(parts)}, *self.messages]
+
+
+def _tokens(message: Dict[str, Any]) -> int:
+    tokens = message.get("tokens")
+    return count_tokens(message["content"]) if tokens is None else tokens  # None: stored before counts were recorded
+
+
+class ConversationMemory:
+    """Reads a constant-size view of a conversation and keeps its summary up to date.
+
+    The window holds the newest messages that fit CHAT_HISTORY_TOKEN_BUDGET (the newest
+    always does). Once CHAT_SUMMARY_MIN_MESSAGES messages have slid out of it unsummarized,
+    a background task folds them into the summary with one LLM call. Until it has, they
+    stretch the window up to CHAT_HISTORY_MAX_TOKENS; older unsummarized messages past
+    that hard cap are left out with a marker, so the prompt stays bounded when refreshes
+    are failing or deferred by the LLM degrade mode.
+    """
+
+    def __init__(self, history: ChatHistory, llm: LLMClient):
+        self.history = history
+        self.llm = llm
+
+    async def append(self, conversation_id: str, role: str, content: str) -> None:
+        await self.history.add_message(conversation_id, role, content, tokens=count_tokens(content))
+
+    async def context(self, conversation_id: str) -> MemoryContext:
+        window = await self.history.get_window(conversation_id, _SETTINGS.CHAT_HISTORY_WINDOW_MESSAGES)
+        messages, first_seq = window.messages, window.first_seq
+        # the summary is behind the fetched window (refreshes failed or were deferred):
+        # fetch the unsummarized messages before it, at most one more window's worth
+        lag_start = max(window.summary_covered + 1, first_seq - _SETTINGS.CHAT_HISTORY_WINDOW_MESSAGES)
+        if first_seq > lag_start:
+            try:
+                older = await self.history.get_range(conversation_id, lag_start, first_seq - 1)
+            except Exception:
+                older = []
+            messages, first_seq = older + messages, first_seq - len(older)
+        tokens = [_tokens(m) for m in messages]
+        fit = used = 0  # newest messages that fit the budget, and their tokens
+        for count in reversed(tokens):
+            if fit and used + count > _SETTINGS.CHAT_HISTORY_TOKEN_BUDGET:
+                break
+            fit += 1
+            used += count
+        # the budget yields to messages the summary does not cover yet, up to the hard cap
+        start = len(messages) - fit
+        unsummarized = max(window.summary_covered - first_seq + 1, 0)
+        while start > unsummarized and used + tokens[start - 1] <= _SETTINGS.CHAT_HISTORY_MAX_TOKENS:
+            start -= 1
+            used += tokens[start]
+        kept = messages[start:]
+        omitted = max(first_seq + start - window.summary_covered - 1, 0)
+        if omitted:
+            METRICS.inc("memory.messages_omitted", omitted)
+
+        # everything before the budgeted window that the summary does not cover yet
+        last_outside = first_seq + len(messages) - fit - 1
+        # optional work: deferred to a later turn while the LLM queue is deep
+        if last_outside - window.summary_covered >= _SETTINGS.CHAT_SUMMARY_MIN_MESSAGES and not self.llm.degraded:
+            self._schedule_refresh(conversation_id, window.summary_covered, last_outside)
+
+        METRICS.observe(
+            "memory.prompt_tokens", used + (count_tokens(window.summary) if window.summary else 0),
+            buckets=(250, 500, 1000, 2000, 4000, 8000),
+        )
+        return MemoryContext(
+            summary=window.summary,
+            messages=[{"role": m["role"], "content": m["content"]} for m in kept],
+            omitted=omitted,
+        )
+
+    def _schedule_refresh(self, conversation_id: str, covered: int, upto: int) -> None:
+        task = asyncio.create_task(self._refresh_summary(conversation_id, covered, upto))
+        _REFRESHES.add(task)
+        task.add_done_callback(_REFRESHES.discard)
+
+    async def _refresh_summary(self, conversation_id: str, covered: int, upto: int) -> None:
+        try:
+            if not await self.history.lock_summary(conversation_id):
+                return  # another request is already folding these in
+        except Exception:
+            return
+        try:
+            summary, stored_covered = await self.history.get_summary(conversation_id)
+            if stored_covered >= upto:
+                return
+            messages = await self.history.get_range(conversation_id, max(covered, stored_covered) + 1, upto)
+            if not messages:
+                return
+            prompt = [
+                {"role": "system", "content": f"You maintain a running summary of a conversation between a user and an assistant. Merge the new messages into the current summary. Keep names, dates, numbers, decisions and open questions. Reply with the updated summary only, in at most {_SETTINGS.CHAT_SUMMARY_MAX_WORDS} words."},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{json.dumps([{'role': m['role'], 'content': m['content']} for m in messages])}"},
+            ]
+            text = await self.llm.generate(prompt, max_tokens=_SETTINGS.CHAT_SUMMARY_MAX_WORDS * 2, call_type="summary")
+            # hard cap, so the summary cannot grow the prompt over time
+            text = " ".join(text.split()[:_SETTINGS.CHAT_SUMMARY_MAX_WORDS])
+            await self.history.set_summary(conversation_id, text, upto)
+            METRICS.inc("memory.summary_refreshes")
+        except Exception:
+            METRICS.inc("memory.summary_errors")
+        finally:
+            try:
+                await self.history.unlock_summary(conversation_id)
+            except Exception:
+                pass
@@ -1,79 +1,311 @@
+import asyncio
 import json
+import re
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import uuid4
+import numpy as np
 from fastapi import HTTPException
-from app.repositories.vector_store import VectorStore
+from app.repositories.vector_store import VectorStore, dense_vector, match_filter
 from app.repositories.redis_repo import ChatHistory
-from app.utils.embeddings import EmbeddingClient
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.utils.embeddings import TextEmbedder
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+from app.utils.reranker import Reranker
+from app.utils.context_packing import pack_context
+from app.utils.mmr import mmr_select
+from app.core.metrics import METRICS
+from app.core.config import get_settings
 from app.utils.llm import LLMClient
+from app.utils.llm_scheduler import LLMOverloaded
 from app.services.booking_service import BookingService
-from app.schemas.chat import ChatResponse, Citation
-from app.schemas.booking import BookingResponse, BookingRequest 
+from app.services.memory_service import ConversationMemory, MemoryContext
+from app.schemas.chat import ChatResponse, Citation, RetrievalFilter
+from app.schemas.booking import BookingResponse, BookingRequest
+
+_SETTINGS = get_settings()
+
+# Turns that may be booking requests are never answered from (or written to) the answer cache
+_BOOKING_HINT = re.compile(r"\b(book|booking|schedule|reschedul\w*|interview|appointment|slot)\b", re.IGNORECASE)
+# Follow-ups that lean on earlier turns: pronouns/demonstratives, back-references, elliptical openers
+_CONTEXT_DEPENDENT = re.compile(
+    r"\b(it|its|they|them|their|theirs|this|that|these|those|he|him|his|she|her|hers|one|ones|"
+    r"same|above|previous|former|latter|else|also|too|again)\b"
+    r"|^\s*(and|but|or|so|then|what about|how about|why not|more|another)\b"
+    r"|\.\.\.|…",
+    re.IGNORECASE,
+)
+
+
+def _self_contained(message: str) -> bool:
+    """Cheap check that a follow-up can be searched without the chat history."""
+    return len(message.split()) >= 4 and not _CONTEXT_DEPENDENT.search(message)
+
+
+class _LatencyAverage:
+    """Exponentially weighted mean of recent condense-call latencies, to estimate time saved."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, seconds: float) -> None:
+        self.value = seconds if self.value is None else self.value + self.alpha * (seconds - self.value)
+
+
+_CONDENSE_LATENCY = _LatencyAverage()
+
+
+def _overloaded(e: LLMOverloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def _unsupported_filter(e: ValueError) -> HTTPException:
+    # the vector store backend rejected a filter it cannot evaluate (VECTOR_BACKEND=local)
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@dataclass
+class RetrievalOptions:
+    """Per-request retrieval settings; None means the configured default."""
+    mode: Optional[str] = None  # "dense" | "hybrid"
+    rerank: Optional[bool] = None
+    filters: Optional[RetrievalFilter] = None
+    mmr: Optional[bool] = None
+    mmr_lambda: Optional[float] = None  # 1 = pure relevance, 0 = pure diversity
+    mmr_fetch_k: Optional[int] = None  # candidates MMR chooses the top k from
+
+
+def _payload_filter(filters: Optional[RetrievalFilter]):
+    if filters is None:
+        return None
+    unknown = set(filters.metadata) - set(_SETTINGS.INDEXED_PAYLOAD_FIELDS)
+    if unknown:
+        # unindexed fields would turn filtered HNSW search into a full scan
+        raise HTTPException(status_code=400, detail=f"Cannot filter on unindexed fields: {sorted(unknown)}")
+    conditions = {k: v for k, v in filters.model_dump(exclude={"metadata"}).items() if v is not None}
+    conditions.update(filters.metadata)
+    return match_filter(conditions)
+
+
+@dataclass
+class _Turn:
+    """State of one chat turn between retrieval and the final answer."""
+    conversation_id: str
+    standalone_question: str
+    query_vector: List[float]
+    cacheable: bool
+    citations: List[Citation] = field(default_factory=list)
+    final_messages: List[Dict[str, Any]] = field(default_factory=list)
+    cached_answer: Optional[str] = None
+
 
 class RAGService:
     def __init__(
         self,
         vector_store: VectorStore,
-        embedder: EmbeddingClient,
+        embedder: TextEmbedder,
         chat_history: ChatHistory,
         llm_client: LLMClient,
         booking_service: BookingService,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        sparse_embedder: Optional[SparseEmbeddingClient] = None,
+        reranker: Optional[Reranker] = None,
     ):
         self.vector_store = vector_store
         self.embedder = embedder
         self.chat_history = chat_history
         self.llm = llm_client
+        self.memory = ConversationMemory(chat_history, llm_client)
         self.booking_service = booking_service
+        self.answer_cache = answer_cache
+        self.sparse_embedder = sparse_embedder
+        self.reranker = reranker
 
-    async def _condense_question(self, messages: list) -> str:
+    async def _condense_question(self, memory: MemoryContext) -> str:
         """If there's a chat history, condense it and the latest question into a standalone question."""
-       
-        if len(messages) <= 1:
+
+        messages = memory.messages
+        if memory.is_first_turn:
             return messages[-1]["content"]
 
+        summary = f"Earlier conversation (summary): {memory.summary}\n\n" if memory.summary else ""
         prompt = [
             {"role": "system", "content": "Given a chat history and a follow-up question, rephrase the follow-up question to be a standalone question that can be understood without the chat history. Do not answer the question, just reformulate it."},
-            {"role": "user", "content": f"Chat History:\n{json.dumps(messages[:-1])}\n\nFollow-up question: {messages[-1]['content']}"}
+            {"role": "user", "content": f"{summary}Chat History:\n{json.dumps(messages[:-1])}\n\nFollow-up question: {messages[-1]['content']}"}
         ]
-        return await self.llm.generate(prompt)
+        return await self.llm.generate(prompt, call_type="condense")
+
+    async def _timed_condense(self, memory: MemoryContext) -> str:
+        start = time.perf_counter()
+        question = await self._condense_question(memory)
+        elapsed = time.perf_counter() - start
+        METRICS.observe("condense.latency_seconds", elapsed)
+        _CONDENSE_LATENCY.update(elapsed)
+        return question
+
+    async def _embed_query(self, text: str) -> List[float]:
+        return (await self.embedder.embed_texts([text]))[0]
+
+    async def _standalone_query(self, memory: MemoryContext, k: int, opts: RetrievalOptions) -> Tuple[str, List[float], Optional[list]]:
+        """Returns the question to retrieve with, its embedding and, when the raw message was
+        searched speculatively and kept, its top-k dense hits.
+
+        On follow-up turns the raw message is embedded and searched while the condense call
+        runs; a self-contained message with a confident best hit cancels that call."""
+        user_message = memory.messages[-1]["content"]
+        if memory.is_first_turn:
+            return user_message, await self._embed_query(user_message), None
+        if self.llm.degraded:  # LLM queue is deep: keep its slots for answers
+            METRICS.inc("condense.skipped_degraded")
+            return user_message, await self._embed_query(user_message), None
+        if _SETTINGS.CONDENSE_MODE == "always":
+            try:
+                question = await self._timed_condense(memory)
+            except Exception:
+                question = user_message
+            return question, await self._embed_query(question), None
+
+        start = time.perf_counter()
+        condense = asyncio.ensure_future(self._timed_condense(memory))
+        condense.add_done_callback(lambda t: t.cancelled() or t.exception())  # errors are handled below or moot
+        try:
+            vector = await self._embed_query(user_message)
+            try:
+                hits = await self.vector_store.search(vector, limit=k, query_filter=_payload_filter(opts.filters))
+            except ValueError as e:
+                raise _unsupported_filter(e)
+        except BaseException:
+            condense.cancel()
+            raise
+        if _self_contained(user_message) and hits and hits[0].score >= _SETTINGS.CONDENSE_SKIP_MIN_SCORE:
+            condense.cancel()
+            METRICS.inc("condense.skipped")
+            if _CONDENSE_LATENCY.value is not None:
+                saved = max(0.0, _CONDENSE_LATENCY.value - (time.perf_counter() - start))
+                METRICS.observe("condense.latency_saved_seconds", saved)
+            return user_message, vector, hits
+
+        METRICS.inc("condense.used")
+        try:
+            question = await condense
+        except Exception:
+            question = user_message
+        if question.strip() == user_message.strip():
+            METRICS.inc("condense.speculative_hits")  # the speculative search was the right one
+            return user_message, vector, hits
+        return question, await self._embed_query(question), None
+
+    async def _search(self, question: str, query_vector: List[float], limit: int, opts: RetrievalOptions) -> list:
+        query_filter = _payload_filter(opts.filters)
+        try:
+            if opts.mode == "dense":
+                return await self.vector_store.search(query_vector, limit=limit, query_filter=query_filter, with_vectors=opts.mmr)
+            sparse = await self.sparse_embedder.embed_query(question)
+            return await self.vector_store.hybrid_search(
+                query_vector, sparse, limit=limit, prefetch_limit=max(limit, _SETTINGS.HYBRID_PREFETCH_LIMIT),
+                query_filter=query_filter, with_vectors=opts.mmr,
+            )
+        except ValueError as e:
+            raise _unsupported_filter(e)
+
+    async def _retrieve(self, question: str, query_vector: List[float], k: int, opts: RetrievalOptions) -> list:
+        """Top-k chunks. Reranking and MMR over-fetch candidates, then keep the cross-encoder's
+        top k and/or a diverse top k (relevance from the rerank scores when there are any)."""
+        limit = k
+        if opts.rerank:
+            limit = max(limit, _SETTINGS.RERANK_CANDIDATES)
+        if opts.mmr:
+            limit = max(limit, opts.mmr_fetch_k)
+        start = time.perf_counter()
+        candidates = await self._search(question, query_vector, limit, opts)
+        METRICS.observe("retrieval.latency_seconds", time.perf_counter() - start)
+        scores = None
+        if opts.rerank:
+            scores = await self.reranker.rerank(question, [c.payload.get("text", "") for c in candidates])
+            if scores is None:  # over budget or busy: keep the retrieval order
+                METRICS.inc("rerank.fallbacks")
+            else:
+                order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+                candidates, scores = [candidates[i] for i in order], [scores[i] for i in order]
+        if opts.mmr and len(candidates) > k:
+            return self._diversify(query_vector, candidates, k, opts.mmr_lambda, scores)
+        return candidates[:k]
+
+    @staticmethod
+    def _diversify(query_vector: List[float], candidates: list, k: int, lambda_mult: float, scores: Optional[List[float]]) -> list:
+        vectors = [dense_vector(c) for c in candidates]
+        if any(v is None for v in vectors):
+            return candidates[:k]
+        start = time.perf_counter()
+        picked = mmr_select(query_vector, np.asarray(vectors, dtype=np.float32), k, lambda_mult, relevance=scores)
+        METRICS.observe("mmr.latency_seconds", time.perf_counter() - start, buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.05))
+        return [candidates[i] for i in picked]
 
-    async def chat(self, user_message: str, conversation_id: str | None, k: int) -> ChatResponse:
+    async def _prepare_turn(
+        self, user_message: str, conversation_id: str | None, k: int, options: Optional[RetrievalOptions] = None
+    ) -> _Turn:
+        """Records the user message, condenses it, checks the answer cache and retrieves context."""
+        opts = replace(options or RetrievalOptions())
+        opts.mode = opts.mode or _SETTINGS.RETRIEVAL_MODE
+        if opts.mode == "hybrid" and self.sparse_embedder is None:
+            raise HTTPException(status_code=400, detail="Hybrid retrieval is not enabled (SPARSE_EMBEDDING_MODEL is unset)")
+        opts.rerank = self.reranker is not None if opts.rerank is None else opts.rerank
+        if opts.rerank and self.reranker is None:
+            raise HTTPException(status_code=400, detail="Reranking is not enabled (RERANK_MODEL is unset)")
+        opts.mmr = _SETTINGS.MMR_ENABLED if opts.mmr is None else opts.mmr
+        opts.mmr_lambda = _SETTINGS.MMR_LAMBDA if opts.mmr_lambda is None else opts.mmr_lambda
+        opts.mmr_fetch_k = opts.mmr_fetch_k or _SETTINGS.MMR_FETCH_K
+        _payload_filter(opts.filters)  # reject bad filters before the turn is recorded
         # get/creatre conversation id
         if not conversation_id:
             conversation_id = str(uuid4())
-        
-        await self.chat_history.add_message(conversation_id, "user", user_message)
-        history = await self.chat_history.get_messages(conversation_id)
 
-        # condense question for better retrieval
-        try:
-            standalone_question = await self._condense_question(history)
-        except Exception:
-            
-            standalone_question = user_message
-
-        # retrieving context from Qdrant
-        query_vector = (await self.embedder.embed_texts([standalone_question]))[0]
-        retrieved_chunks = await self.vector_store.client.search(
-            collection_name=self.vector_store.collection,
-            query_vector=query_vector,
-            limit=k,
-            with_payload=True
+        # token-budgeted window of recent turns plus the rolling summary of older ones
+        await self.memory.append(conversation_id, "user", user_message)
+        memory = await self.memory.context(conversation_id)
+
+        # condense question for better retrieval (skipped when the message stands on its own)
+        standalone_question, query_vector, speculative_hits = await self._standalone_query(memory, k, opts)
+
+        # semantic answer cache: paraphrases of answered questions skip retrieval + LLM
+        # filtered turns see a subset of the corpus, so their answers are not shared
+        cacheable = self.answer_cache is not None and opts.filters is None and not (
+            _BOOKING_HINT.search(user_message) or _BOOKING_HINT.search(standalone_question)
         )
+        turn = _Turn(conversation_id, standalone_question, query_vector, cacheable)
+        if cacheable:
+            try:
+                cached = await self.answer_cache.lookup(query_vector)
+            except Exception:
+                cached = None
+            if cached is not None:
+                turn.cached_answer, turn.citations = cached
+                return turn
+
+        if speculative_hits is not None and opts.mode == "dense" and not (opts.rerank or opts.mmr):
+            retrieved_chunks = speculative_hits  # same query, same search: reuse it
+        else:
+            retrieved_chunks = await self._retrieve(standalone_question, query_vector, k, opts)
+
+
+        # neighbouring chunks merged without their overlap, most relevant passages first, within budget
+        packed = pack_context(retrieved_chunks, _SETTINGS.CONTEXT_TOKEN_BUDGET, merge=_SETTINGS.CONTEXT_MERGE_ADJACENT)
+        context = packed.render()
+        METRICS.observe("context.tokens", packed.tokens, buckets=(250, 500, 1000, 2000, 4000, 8000))
+        METRICS.inc("context.tokens_saved", max(packed.raw_tokens - packed.tokens, 0))
+        # in retrieval order (rerank / MMR), like the passages; a dict keeps it while deduplicating
+        rank = {id(h): i for i, h in enumerate(retrieved_chunks)}
+        citations: Dict[tuple, None] = {}
+        for chunk in sorted(packed.hits, key=lambda h: rank[id(h)]):
+            citations[(chunk.payload['doc_id'], chunk.payload.get('filename'), chunk.score)] = None
+
+        turn.citations = [Citation(doc_id=c[0], filename=c[1], score=c[2]) for c in citations]
 
-        
-        context = ""
-        citations_set = set() 
-        for chunk in retrieved_chunks:
-            context += f"\n---\n{chunk.payload.get('text', '')}"
-            # Create a tuple to store in the set for uniqueness
-            citation_tuple = (chunk.payload['doc_id'], chunk.payload.get('filename'), chunk.score)
-            citations_set.add(citation_tuple)
-        
-        citations = [Citation(doc_id=c[0], filename=c[1], score=c[2]) for c in sorted(list(citations_set), key=lambda x: x[2], reverse=True)]
-       
         booking_schema = BookingRequest.model_json_schema()["properties"]
         booking_json_format = json.dumps({"tool_name": "book_interview", "arguments": booking_schema})
-        
+
         system_prompt = f"""You are an expert assistant. Your job is to answer user questions based ONLY on the provided context, or to help them book an interview.
 
 RULES:
@@ -84,46 +316,129 @@ RULES:
 Context:
 {context}
 """
-        final_messages = [{"role": "system", "content": system_prompt}, *history]
+        turn.final_messages = [{"role": "system", "content": system_prompt}, *memory.as_messages()]
+        return turn
 
-        # 6. Generating response from LLM 
-        try:
-            llm_text_response = await self.llm.generate(final_messages)
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"LLM provider error: {e}")
+    async def _handle_reply(self, turn: _Turn, llm_text_response: str) -> Tuple[str, Optional[BookingResponse], bool]:
+        """Returns (answer, booking_info, is_tool_call), executing a booking tool call if the LLM made one."""
+        answer, booking_info, is_tool_call = "", None, False
 
-        answer, booking_info = "", None
 
-     
         try:
-           
+
             if llm_text_response.strip().startswith('{') and llm_text_response.strip().endswith('}'):
                 data = json.loads(llm_text_response)
                 if isinstance(data, dict) and data.get("tool_name") == "book_interview":
+                    is_tool_call = True
                     args = data.get("arguments", {})
                     try:
-                        booking_result = await self.booking_service.create_booking(**args, conversation_id=conversation_id)
+                        booking_result = await self.booking_service.create_booking(**args, conversation_id=turn.conversation_id)
                         booking_info = BookingResponse(**booking_result)
                         answer = f"Success! Your interview is confirmed for {booking_info.start_time_utc.strftime('%A, %B %d at %H:%M UTC')}. A confirmation email will be sent. Booking ID: {booking_info.booking_id}"
                     except (ValueError, RuntimeError) as e:
                         answer = f"I tried to book the interview, but there was a problem. Reason: {e}"
                 else:
-                   
+
                     answer = llm_text_response
             else:
-              
+
                 answer = llm_text_response
         except (json.JSONDecodeError, AttributeError):
-          
+
             answer = llm_text_response
+        return answer, booking_info, is_tool_call
 
+    async def _finish_turn(self, turn: _Turn, answer: str, is_tool_call: bool) -> None:
         # Saving the final assistant response to chat history
-        await self.chat_history.add_message(conversation_id, "assistant", answer)
+        await self.memory.append(turn.conversation_id, "assistant", answer)
+
+        if turn.cacheable and turn.cached_answer is None and not is_tool_call and turn.citations:
+            try:
+                await self.answer_cache.store_answer(turn.standalone_question, turn.query_vector, answer, turn.citations)
+            except Exception:
+                pass
+
+    async def chat(
+        self, user_message: str, conversation_id: str | None, k: int, options: Optional[RetrievalOptions] = None
+    ) -> ChatResponse:
+        turn = await self._prepare_turn(user_message, conversation_id, k, options)
+        if turn.cached_answer is not None:
+            await self._finish_turn(turn, turn.cached_answer, False)
+            return ChatResponse(answer=turn.cached_answer, conversation_id=turn.conversation_id, citations=turn.citations)
+
+        # Generating response from LLM
+        try:
+            llm_text_response = await self.llm.generate(turn.final_messages, call_type="answer")
+        except LLMOverloaded as e:
+            raise _overloaded(e)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"LLM provider error: {e}")
+
+        answer, booking_info, is_tool_call = await self._handle_reply(turn, llm_text_response)
+        await self._finish_turn(turn, answer, is_tool_call)
 
         # final structured response
         return ChatResponse(
             answer=answer,
-            conversation_id=conversation_id,
-            citations=citations if not booking_info else [], 
+            conversation_id=turn.conversation_id,
+            citations=turn.citations if not booking_info else [],
             booking_info=booking_info
-        )
\ No newline at end of file
+        )
+
+    async def chat_stream(
+        self, user_message: str, conversation_id: str | None, k: int, options: Optional[RetrievalOptions] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (event, data) pairs: `citations`, then `token`s, then `done` (or `error`)."""
+        turn = await self._prepare_turn(user_message, conversation_id, k, options)
+        lease = None
+        if turn.cached_answer is None:
+            # admitted before the first event, so a shed request still gets a 429/503
+            try:
+                lease = await self.llm.admit("answer")
+            except LLMOverloaded as e:
+                raise _overloaded(e)
+        try:
+            async for event in self._stream_turn(turn, lease):
+                yield event
+        finally:
+            if lease is not None:
+                lease.release()
+
+    async def _stream_turn(self, turn: _Turn, lease) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        yield "citations", {"citations": [c.model_dump() for c in turn.citations]}
+
+        if turn.cached_answer is not None:
+            await self._finish_turn(turn, turn.cached_answer, False)
+            yield "token", {"text": turn.cached_answer}
+            yield "done", {"conversation_id": turn.conversation_id, "booking_info": None}
+            return
+
+        # Stream text as it arrives; a reply starting with "{" may be a booking tool call,
+        # so it is buffered to the end and never shown raw.
+        parts: List[str] = []
+        streaming: Optional[bool] = None
+        try:
+            async for token in self.llm.generate_stream(turn.final_messages, lease=lease):
+                parts.append(token)
+                if streaming is None:
+                    head = "".join(parts).lstrip()
+                    if not head:
+                        continue
+                    streaming = not head.startswith("{")
+                    if streaming:
+                        yield "token", {"text": "".join(parts)}
+                elif streaming:
+                    yield "token", {"text": token}
+        except Exception as e:
+            yield "error", {"detail": f"LLM provider error: {e}"}
+            return
+
+        llm_text_response = "".join(parts)
+        answer, booking_info, is_tool_call = await self._handle_reply(turn, llm_text_response)
+        if not streaming:
+            yield "token", {"text": answer}
+        await self._finish_turn(turn, answer, is_tool_call)
+        yield "done", {
+            "conversation_id": turn.conversation_id,
+            "booking_info": booking_info.model_dump(mode="json") if booking_info else None,
+        }
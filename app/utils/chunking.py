@@ -1,4 +1,5 @@
-from typing import List, Tuple
+from itertools import accumulate
+from typing import Iterator, List, Optional, Tuple, Union
 import re
 
 try:
@@ -15,6 +16,13 @@ def count_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
 
+def _count_many(texts: List[str]) -> List[int]:
+    """count_tokens for many texts in one (multi-threaded) tiktoken call."""
+    if _ENC:
+        return [len(t) for t in _ENC.encode_batch(texts)]
+    return [count_tokens(t) for t in texts]
+
+
 def _encode(text: str) -> List[int]:
     if _ENC:
         return _ENC.encode(text)
@@ -28,43 +36,202 @@ def _decode(tokens: List[int]) -> str:
 
     return "".join(chr(t) for t in tokens)
 
-#chunksize=500, 50 token overlap
-def chunk_fixed_tokens(text: str, chunk_size: int = 500, overlap: int = 50) -> List[Tuple[str, int]]:
-    toks = _encode(text)
-    n = len(toks)
-    chunks: List[Tuple[str, int]] = []
+
+_TOKEN_BYTE_LENGTHS: Optional[List[int]] = None
+
+
+def _token_byte_lengths() -> List[int]:
+    """UTF-8 byte length of every token id, built once per process."""
+    global _TOKEN_BYTE_LENGTHS
+    if _TOKEN_BYTE_LENGTHS is None:
+        lengths = []
+        for t in range(_ENC.n_vocab):
+            try:
+                lengths.append(len(_ENC.decode_single_token_bytes(t)))
+            except KeyError:  # unused id
+                lengths.append(0)
+        _TOKEN_BYTE_LENGTHS = lengths
+    return _TOKEN_BYTE_LENGTHS
+
+
+class _TokenBuffer:
+    """Tokens of a text plus the offset where each token ends, so a token window is
+    turned back into text by slicing the source instead of decoding the tokens.
+
+    Offsets are into the UTF-8 bytes of the text (into the text itself for the
+    char-level fallback encoding)."""
+
+    def __init__(self, text: str = ""):
+        self.tokens: List[int] = []
+        self._ends: List[int] = []
+        self._data: Union[bytes, str] = b"" if _ENC else ""
+        if text:
+            self.extend(text)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def extend(self, text: str) -> None:
+        toks = _encode(text)
+        base = len(self._data)
+        if _ENC:
+            data: Union[bytes, str] = text.encode("utf-8")
+            ends = accumulate(map(_token_byte_lengths().__getitem__, toks), initial=base)
+            next(ends)  # the start offset of this text
+            self._ends.extend(ends)
+        else:
+            data = text
+            self._ends.extend(range(base + 1, base + len(toks) + 1))
+        self.tokens.extend(toks)
+        self._data += data
+
+    def text(self, start: int, end: int) -> str:
+        """Text of tokens [start, end)."""
+        lo = self._ends[start - 1] if start else 0
+        piece = self._data[lo:self._ends[end - 1]]
+        # a window may cut a multi-byte character, exactly like decoding its tokens would
+        return piece.decode("utf-8", errors="replace") if isinstance(piece, bytes) else piece
+
+    def drop(self, n: int) -> None:
+        """Forgets the first `n` tokens (and their text)."""
+        if n <= 0:
+            return
+        cut = self._ends[n - 1]
+        self._data = self._data[cut:]
+        self._ends = [e - cut for e in self._ends[n:]]
+        self.tokens = self.tokens[n:]
+
+
+def iter_fixed_tokens(text: str, chunk_size: int = 500, overlap: int = 50) -> Iterator[Tuple[str, int]]:
+    """Sliding token windows over `text`; the text is tokenized once and each window is a slice of it."""
+    buf = _TokenBuffer(text)
+    n = len(buf)
     i = 0
     while i < n:
         j = min(i + chunk_size, n)
-        sub = toks[i:j]
-        chunks.append((_decode(sub), len(sub)))
+        yield buf.text(i, j), j - i
         if j == n:
             break
         i = max(0, j - overlap)
-    return chunks
+
+
+#chunksize=500, 50 token overlap
+def chunk_fixed_tokens(text: str, chunk_size: int = 500, overlap: int = 50) -> List[Tuple[str, int]]:
+    return list(iter_fixed_tokens(text, chunk_size, overlap))
 
 
 _SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_COUNT_BATCH = 1024  # sentences tokenized per encode_batch call
+
+def _counted(texts: List[str]) -> List[Tuple[str, int]]:
+    return list(zip(texts, _count_many(texts))) if texts else []
+
+
+class _SentencePacker:
+    """Greedy sentence packing shared by chunk_semantic and StreamingChunker.
+
+    Every sentence is tokenized once and rollover decisions use the sums of the
+    per-sentence counts. Those sums drift from the count of the joined text (BPE
+    merges across the joining spaces), so each emitted chunk is counted once more,
+    batched per call, to report an exact `token_count`."""
+
+    def __init__(self, max_tokens: int, overlap_sentences: int):
+        self.max_tokens = max_tokens
+        self.overlap_sentences = overlap_sentences
+        self.curr: List[str] = []
+        self.counts: List[int] = []
+        self.curr_tok = 0
+
+    def _add(self, sent: str, stoks: int) -> Optional[str]:
+        """Adds a sentence; returns the text of the chunk it closed, if any."""
+        done = None
+        if self.curr and self.curr_tok + stoks > self.max_tokens:
+            done = " ".join(self.curr).strip()
+            # overlap: keep last N sentences
+            keep = self.overlap_sentences if self.overlap_sentences > 0 else 0
+            self.curr = self.curr[-keep:] if keep else []
+            self.counts = self.counts[-keep:] if keep else []
+            self.curr_tok = sum(self.counts)
+        self.curr.append(sent)
+        self.counts.append(stoks)
+        self.curr_tok += stoks
+        return done
+
+    def add(self, sent: str, stoks: Optional[int] = None) -> List[Tuple[str, int]]:
+        done = self._add(sent, count_tokens(sent) if stoks is None else stoks)
+        return _counted([done]) if done is not None else []
+
+    def add_many(self, sentences: List[str]) -> Iterator[Tuple[str, int]]:
+        for i in range(0, len(sentences), _COUNT_BATCH):
+            batch = sentences[i:i + _COUNT_BATCH]
+            closed = (self._add(sent, stoks) for sent, stoks in zip(batch, _count_many(batch)))
+            yield from _counted([c for c in closed if c is not None])
+
+    def flush(self) -> List[Tuple[str, int]]:
+        if not self.curr:
+            return []
+        chunk_text = " ".join(self.curr).strip()
+        self.curr, self.counts, self.curr_tok = [], [], 0
+        return _counted([chunk_text]) if chunk_text else []
+
+
+def iter_semantic(text: str, max_tokens: int = 500, overlap_sentences: int = 2) -> Iterator[Tuple[str, int]]:
+    """Sentence-packed chunks of `text`, yielded as soon as each one is complete."""
+    packer = _SentencePacker(max_tokens, overlap_sentences)
+    yield from packer.add_many(_SENT_SPLIT.split(text))
+    yield from packer.flush()
+
 
 #split by sentences, overlap sentences=2
 def chunk_semantic(text: str, max_tokens: int = 500, overlap_sentences: int = 2) -> List[Tuple[str, int]]:
-    sentences = _SENT_SPLIT.split(text)
-    chunks: List[Tuple[str, int]] = []
-    curr: List[str] = []
-    curr_tok = 0
-
-    for sent in sentences:
-        stoks = count_tokens(sent)
-        if curr and curr_tok + stoks > max_tokens:
-            chunk_text = " ".join(curr).strip()
-            chunks.append((chunk_text, count_tokens(chunk_text)))
-            # overlap: keep last N sentences
-            curr = curr[-overlap_sentences:] if overlap_sentences > 0 else []
-            curr_tok = count_tokens(" ".join(curr)) if curr else 0
-        curr.append(sent)
-        curr_tok += stoks
-
-    if curr:
-        chunk_text = " ".join(curr).strip()
-        chunks.append((chunk_text, count_tokens(chunk_text)))
-    return chunks
\ No newline at end of file
+    return list(iter_semantic(text, max_tokens, overlap_sentences))
+
+
+class StreamingChunker:
+    """Incremental version of the chunkers: text is fed piece by piece (e.g. page by
+    page) and finished chunks are returned as soon as they are complete. Overlap is
+    carried across piece boundaries; only the unfinished tail is held in memory."""
+
+    _MAX_PENDING_CHARS = 64_000  # force a sentence break in text without punctuation
+
+    def __init__(self, strategy: str, chunk_size: int = 500, overlap: int = 50):
+        self.strategy = strategy
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._buf = _TokenBuffer()
+        self._fresh = 0  # tokens in the buffer not yet part of an emitted chunk
+        self._pending = ""
+        self._packer = _SentencePacker(chunk_size, max(0, overlap // 50))
+
+    def feed(self, text: str) -> List[Tuple[str, int]]:
+        if self.strategy == "fixed":
+            before = len(self._buf)
+            self._buf.extend(text)
+            self._fresh += len(self._buf) - before
+            out: List[Tuple[str, int]] = []
+            while len(self._buf) >= self.chunk_size and self._fresh > 0:
+                out.append((self._buf.text(0, self.chunk_size), self.chunk_size))
+                self._buf.drop(max(1, self.chunk_size - self.overlap))
+                remaining = len(self._buf)
+                self._fresh = min(self._fresh, remaining - min(self.overlap, remaining))
+            return out
+
+        self._pending += text
+        sentences = _SENT_SPLIT.split(self._pending)
+        self._pending = sentences.pop()  # may be an unfinished sentence
+        if len(self._pending) > self._MAX_PENDING_CHARS:
+            sentences.append(self._pending)
+            self._pending = ""
+        return list(self._packer.add_many(sentences))
+
+    def flush(self) -> List[Tuple[str, int]]:
+        if self.strategy == "fixed":
+            if self._fresh <= 0 or not len(self._buf):
+                return []
+            n = len(self._buf)
+            out = [(self._buf.text(0, n), n)]
+            self._buf, self._fresh = _TokenBuffer(), 0
+            return out
+        out = self._packer.add(self._pending) if self._pending.strip() else []
+        self._pending = ""
+        return out + self._packer.flush()
@@ -0,0 +1,113 @@
+# Assembles retrieved chunks into the LLM context: merge overlapping neighbours, pack to a token budget
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from app.utils.chunking import count_tokens
+
+_MIN_OVERLAP_CHARS = 16  # shorter suffix/prefix matches are treated as coincidence
+_MAX_OVERLAP_CHARS = 8000  # chunkers overlap by tens of tokens; never scan further back than this
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    tail = left[-_MAX_OVERLAP_CHARS:]
+    probe = right[:_MIN_OVERLAP_CHARS]
+    if len(probe) < _MIN_OVERLAP_CHARS:
+        return 0
+    pos = tail.find(probe)
+    while pos != -1:
+        size = len(tail) - pos
+        if right.startswith(tail[pos:]) and size >= _MIN_OVERLAP_CHARS:
+            return size  # earliest start = longest overlap
+        pos = tail.find(probe, pos + 1)
+    return 0
+
+
+def merge_texts(left: str, right: str) -> str:
+    """Joins two consecutive chunks, dropping the text they share."""
+    size = _overlap(left, right)
+    return left + right[size:] if size else f"{left}\n{right}"
+
+
+@dataclass
+class Passage:
+    """One or more consecutive chunks of a document, merged into a single text."""
+    hits: List[Any]  # retrieved points (ScoredPoint / SearchHit), in chunk order
+    text: str
+    rank: int  # best position of its hits in the retrieval order; 0 = most relevant
+    tokens: int = 0
+
+
+@dataclass
+class PackedContext:
+    passages: List[Passage] = field(default_factory=list)
+    tokens: int = 0
+    raw_tokens: int = 0  # what concatenating every hit verbatim would have cost
+
+    @property
+    def hits(self) -> List[Any]:
+        """The original chunks that made it into the context (for citations)."""
+        return [h for p in self.passages for h in p.hits]
+
+    def render(self, separator: str = "\n---\n") -> str:
+        return "".join(f"{separator}{p.text}" for p in self.passages)
+
+
+def _chunk_tokens(hit: Any) -> int:
+    # counted like the merged passages (not payload token_count), so the two compare
+    return count_tokens(hit.payload.get("text", ""))
+
+
+def merge_adjacent(hits: List[Any]) -> List[Passage]:
+    """Groups hits of the same document whose chunk_index values are consecutive;
+    `hits` are in relevance order, which sets each passage's rank."""
+    by_doc: dict = {}
+    loose: List[Passage] = []
+    for rank, hit in enumerate(hits):
+        index = hit.payload.get("chunk_index")
+        if index is None:
+            loose.append(Passage([hit], hit.payload.get("text", ""), rank))
+        else:
+            by_doc.setdefault(hit.payload.get("doc_id"), {})[index] = (rank, hit)  # duplicates keep the last
+
+    passages = loose
+    for chunks in by_doc.values():
+        run: List[tuple] = []
+        for index in sorted(chunks):
+            if run and index != run[-1][1].payload["chunk_index"] + 1:
+                passages.append(_join(run))
+                run = []
+            run.append(chunks[index])
+        passages.append(_join(run))
+    return passages
+
+
+def _join(run: List[tuple]) -> Passage:
+    hits = [hit for _, hit in run]
+    text = hits[0].payload.get("text", "")
+    for hit in hits[1:]:
+        text = merge_texts(text, hit.payload.get("text", ""))
+    return Passage(hits, text, min(rank for rank, _ in run))
+
+
+def pack_context(hits: List[Any], token_budget: int, merge: bool = True) -> PackedContext:
+    """Most relevant passages first, until `token_budget` is spent.
+
+    `hits` must be in final relevance order (after any rerank or MMR): that order,
+    not the raw search score, decides what is kept. A merged passage that does not
+    fit is retried chunk by chunk, so one long run cannot crowd out everything else.
+    The best chunk is always included."""
+    packed = PackedContext(raw_tokens=sum(_chunk_tokens(h) for h in hits))
+    candidates = merge_adjacent(hits) if merge else [Passage([h], h.payload.get("text", ""), i) for i, h in enumerate(hits)]
+    pending = sorted(candidates, key=lambda p: p.rank)
+    rank = {id(h): i for i, h in enumerate(hits)}
+    while pending:
+        passage = pending.pop(0)
+        passage.tokens = count_tokens(passage.text) if len(passage.hits) > 1 else _chunk_tokens(passage.hits[0])
+        if packed.tokens + passage.tokens <= token_budget or (not packed.passages and len(passage.hits) == 1):
+            packed.passages.append(passage)
+            packed.tokens += passage.tokens
+        elif len(passage.hits) > 1:
+            singles = [Passage([h], h.payload.get("text", ""), rank[id(h)]) for h in passage.hits]
+            pending = sorted(pending + singles, key=lambda p: p.rank)
+    return packed
@@ -0,0 +1,131 @@
+# Memoization for query embeddings: in-process LRU + optional shared Redis tier
+from __future__ import annotations
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.utils.embeddings import TextEmbedder
+
+_SETTINGS = get_settings()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _to_bytes(vector: List[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _from_bytes(data: bytes) -> List[float]:
+    return np.frombuffer(data, dtype=np.float32).tolist()
+
+
+class _LRU:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CachedEmbedder:
+    """Wraps any TextEmbedder; vectors are keyed by sha256(model, normalized text)
+    and stored as packed float32 bytes in both tiers."""
+
+    def __init__(
+        self,
+        inner: TextEmbedder,
+        redis_client: Optional[redis.Redis] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+    ):
+        self.inner = inner
+        self.model = inner.model
+        self.dim = inner.dim
+        self.redis = redis_client
+        self.ttl = ttl_seconds or _SETTINGS.EMBED_CACHE_TTL_SECONDS
+        self._lru = _LRU(max_entries or _SETTINGS.EMBED_CACHE_MAX_ENTRIES, self.ttl)
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"emb:q:{key}"
+
+    async def _redis_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        if self.redis is None or not keys:
+            return [None] * len(keys)
+        try:
+            return await self.redis.mget([self._redis_key(k) for k in keys])
+        except redis.RedisError:
+            return [None] * len(keys)
+
+    async def _redis_put(self, items: Dict[str, bytes]) -> None:
+        if self.redis is None or not items:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for k, v in items.items():
+                    pipe.set(self._redis_key(k), v, ex=self.ttl)
+                await pipe.execute()
+        except redis.RedisError:
+            pass
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_cache_key(self.model, t) for t in texts]
+        found: Dict[str, bytes] = {}
+        for k in keys:
+            hit = self._lru.get(k)
+            if hit is not None:
+                found[k] = hit
+        METRICS.inc("embedding.cache.hits.memory", len(found))
+
+        pending = [k for k in dict.fromkeys(keys) if k not in found]
+        redis_hits = 0
+        for k, raw in zip(pending, await self._redis_get(pending)):
+            if raw is not None:
+                found[k] = raw
+                self._lru.put(k, raw)
+                redis_hits += 1
+        METRICS.inc("embedding.cache.hits.redis", redis_hits)
+
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        METRICS.inc("embedding.cache.misses", len(missing))
+        if missing:
+            vectors = await self.inner.embed_texts(list(missing.values()))
+            fresh = {k: _to_bytes(v) for k, v in zip(missing, vectors)}
+            for k, raw in fresh.items():
+                self._lru.put(k, raw)
+                found[k] = raw
+            await self._redis_put(fresh)
+        METRICS.set("embedding.cache.entries", len(self._lru))
+        return [_from_bytes(found[k]) for k in keys]
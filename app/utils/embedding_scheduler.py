@@ -0,0 +1,100 @@
+# Cross-request micro-batching for query embeddings
+from __future__ import annotations
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.utils.embeddings import EmbeddingClient
+
+_SETTINGS = get_settings()
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_DEPTH_BUCKETS = (0, 1, 4, 16, 64, 256, 1024)
+
+
+class EmbeddingScheduler:
+    """Collects concurrent embed requests for up to `max_wait_ms` (or until
+    `max_batch_size` texts are queued) and runs them as one model batch.
+
+    Exposes the same `embed_texts` surface as EmbeddingClient, so services can
+    use either interchangeably.
+    """
+
+    def __init__(
+        self,
+        client: EmbeddingClient,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        self.client = client
+        self.model = client.model
+        self.dim = client.dim
+        self.max_batch_size = max_batch_size or _SETTINGS.EMBED_BATCH_MAX_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else _SETTINGS.EMBED_BATCH_MAX_WAIT_MS) / 1000.0
+        self._queue: asyncio.Queue[Tuple[str, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            _, fut = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Embedding scheduler stopped"))
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            self._queue.put_nowait((text, fut))
+            futures.append(fut)
+        METRICS.set("embedding.scheduler.queue_depth", self._queue.qsize())
+        return list(await asyncio.gather(*futures))
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            METRICS.observe("embedding.scheduler.queue_depth", self._queue.qsize(), buckets=_DEPTH_BUCKETS)
+            METRICS.set("embedding.scheduler.queue_depth", self._queue.qsize())
+            # Callers that gave up (client disconnect, timeout) don't cost model time
+            batch = [(t, f) for t, f in batch if not f.done()]
+            if not batch:
+                continue
+            METRICS.observe("embedding.scheduler.batch_size", len(batch), buckets=_BATCH_BUCKETS)
+            try:
+                vectors = await self.client.embed_texts([t for t, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
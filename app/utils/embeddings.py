@@ -1,11 +1,24 @@
 # Supports: openai | fastembed | local (sentence-transformers)
 from __future__ import annotations
-from typing import List, Optional
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 import asyncio
+import os
+import time
+import numpy as np
 from app.core.config import get_settings
+from app.core.metrics import METRICS
 
 _SETTINGS = get_settings()
 
+class TextEmbedder(Protocol):
+    """Anything that turns texts into vectors: the client itself or a wrapper around it."""
+    model: str
+    dim: int
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]: ...
+
+
 class EmbeddingClient:
     def __init__(self, provider: Optional[str] = None, model: Optional[str] = None, dim: Optional[int] = None):
         self.provider = provider or _SETTINGS.EMBEDDING_PROVIDER
@@ -24,11 +37,20 @@ class EmbeddingClient:
                 raise RuntimeError("OPENAI_API_KEY not set")
             self._client = AsyncOpenAI(api_key=_SETTINGS.OPENAI_API_KEY)
         elif self.provider in ("fastembed", "local"):
-            # lazy init on first use
+            # lazy init on first use (or eagerly via load())
             pass
         else:
             raise ValueError(f"Unknown embedding provider: {self.provider}")
 
+    def load(self) -> None:
+        """Loads the local model weights into memory (blocking). No-op for remote providers."""
+        if self.provider == "fastembed" and self._fast_model is None:
+            from fastembed import TextEmbedding
+            self._fast_model = TextEmbedding(model_name=self.model)
+        elif self.provider == "local" and self._st_model is None:
+            from sentence_transformers import SentenceTransformer
+            self._st_model = SentenceTransformer(self.model)
+
     async def _embed_openai(self, texts: List[str]) -> List[List[float]]:
         batch_size = 64
         out: List[List[float]] = []
@@ -38,27 +60,105 @@ class EmbeddingClient:
             out.extend([d.embedding for d in resp.data])
         return out
 
-    async def _embed_fastembed(self, texts: List[str]) -> List[List[float]]:
-        def _load_and_encode() -> List[List[float]]:
-            from fastembed import TextEmbedding
-            if self._fast_model is None:
-                self._fast_model = TextEmbedding(model_name=self.model)
-            return [v.tolist() for v in self._fast_model.embed(texts, batch_size=32, normalize=True)]
+    async def _embed_fastembed(self, texts: List[str]) -> np.ndarray:
+        def _load_and_encode() -> np.ndarray:
+            self.load()
+            vecs = list(self._fast_model.embed(texts, batch_size=32, normalize=True))
+            if not vecs:
+                return np.empty((0, self.dim), dtype=np.float32)
+            return np.stack(vecs).astype(np.float32, copy=False)
         return await asyncio.to_thread(_load_and_encode)
 
-    async def _embed_local(self, texts: List[str]) -> List[List[float]]:
-        def _load_and_encode() -> List[List[float]]:
-            from sentence_transformers import SentenceTransformer
-            if self._st_model is None:
-                self._st_model = SentenceTransformer(self.model)
-            vecs = self._st_model.encode(texts, batch_size=32, normalize_embeddings=True)  # type: ignore
-            return vecs.tolist()
+    async def _embed_local(self, texts: List[str]) -> np.ndarray:
+        def _load_and_encode() -> np.ndarray:
+            self.load()
+            vecs = self._st_model.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)  # type: ignore
+            return vecs.astype(np.float32, copy=False)
         return await asyncio.to_thread(_load_and_encode)
 
-    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    async def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embeddings as one contiguous (len(texts), dim) float32 array; used by ingestion."""
         if self.provider == "openai":
-            return await self._embed_openai(texts)
+            return np.asarray(await self._embed_openai(texts), dtype=np.float32)
         if self.provider == "fastembed":
             return await self._embed_fastembed(texts)
         # "local" = sentence-transformers
-        return await self._embed_local(texts)
\ No newline at end of file
+        return await self._embed_local(texts)
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if self.provider == "openai":
+            return await self._embed_openai(texts)
+        return (await self.embed_array(texts)).tolist()
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class EmbeddingModelStatus:
+    provider: str
+    model: str
+    ready: bool = False
+    load_seconds: Optional[float] = None
+    memory_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+class EmbeddingRegistry:
+    """Process-wide set of loaded embedding clients, one per (provider, model).
+
+    Created in the app lifespan; API dependencies fetch clients from here so
+    the model weights are loaded (and warmed up) exactly once per process.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], EmbeddingClient] = {}
+        self._status: Dict[Tuple[str, str], EmbeddingModelStatus] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(provider: Optional[str], model: Optional[str]) -> Tuple[str, str]:
+        return (provider or _SETTINGS.EMBEDDING_PROVIDER, model or _SETTINGS.EMBEDDING_MODEL)
+
+    async def load(self, provider: Optional[str] = None, model: Optional[str] = None) -> EmbeddingClient:
+        key = self._key(provider, model)
+        async with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+            status = self._status[key] = EmbeddingModelStatus(provider=key[0], model=key[1])
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                client = EmbeddingClient(provider=key[0], model=key[1])
+                await asyncio.to_thread(client.load)
+                await client.embed_texts(["warmup"])  # first inference allocates the ONNX arena
+            except Exception as e:
+                status.error = str(e)
+                raise
+            status.load_seconds = time.perf_counter() - start
+            status.memory_bytes = max(0, _rss_bytes() - rss_before)
+            status.ready = True
+            self._clients[key] = client
+            METRICS.set(f"embedding.load_seconds.{key[1]}", status.load_seconds)
+            METRICS.set(f"embedding.memory_bytes.{key[1]}", status.memory_bytes)
+            return client
+
+    def get(self, provider: Optional[str] = None, model: Optional[str] = None) -> EmbeddingClient:
+        key = self._key(provider, model)
+        client = self._clients.get(key)
+        if client is None:
+            raise LookupError(f"Embedding model not loaded: {key[0]}/{key[1]}")
+        return client
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._status) and all(s.ready for s in self._status.values())
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [asdict(s) for s in self._status.values()]
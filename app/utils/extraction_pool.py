@@ -0,0 +1,157 @@
+# Runs CPU-bound text extraction / OCR in a bounded process pool, off the event loop
+from __future__ import annotations
+import asyncio
+import codecs
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+from app.repositories.ocr_cache import OcrCache
+from app.utils.text_extraction import (
+    PageInfo, detect_kind, merge_page_text, normalize_block, ocr_pdf_page,
+    pdf_num_pages, pdf_page_count, pdf_page_range, _require_pdf2image,
+)
+
+_SETTINGS = get_settings()
+_TXT_BLOCK_BYTES = 1 << 20
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when too many documents are already waiting for extraction."""
+
+
+@dataclass
+class PageText:
+    page_number: int  # 1-based; text files are split into fixed-size blocks instead of pages
+    text: str
+    used_ocr: bool = False
+
+
+class ExtractionPool:
+    """Owned by the app lifespan. At most `max_queue` documents are admitted at
+    once; OCR fans out one task per page so a scanned PDF uses every worker.
+    With `use_processes=False` the same work runs in threads (CLI tools, tests)."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        ocr_cache: Optional[OcrCache] = None,
+        use_processes: bool = True,
+    ):
+        self.max_workers = max_workers or _SETTINGS.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.max_queue = max_queue or _SETTINGS.EXTRACTION_MAX_QUEUE
+        self.ocr_cache = ocr_cache
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) if use_processes else None
+        self._active = 0
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @asynccontextmanager
+    async def _admit(self) -> AsyncIterator[None]:
+        if self._active >= self.max_queue:
+            METRICS.inc("extraction.rejected")
+            raise PoolSaturated(f"Extraction queue is full ({self.max_queue} documents in progress)")
+        self._active += 1
+        METRICS.set("extraction.active_documents", self._active)
+        try:
+            yield
+        finally:
+            self._active -= 1
+            METRICS.set("extraction.active_documents", self._active)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _ocr_pages(self, path: str, first: int, infos: List[PageInfo], use_ocr: bool) -> List[PageText]:
+        todo = [i for i, p in enumerate(infos) if p.needs_ocr] if use_ocr else []
+        ocr_texts: Dict[int, str] = {}
+        if todo:
+            _require_pdf2image()
+            hashes = {i: infos[i].content_hash for i in todo if infos[i].content_hash}
+            if self.ocr_cache is not None and hashes:
+                cached = await self.ocr_cache.get_many(list(hashes.values()))
+                ocr_texts.update((i, t) for i, t in zip(hashes, cached) if t is not None)
+                METRICS.inc("extraction.ocr_cache_hits", len(ocr_texts))
+
+            misses = [i for i in todo if i not in ocr_texts]
+            if misses:
+                # Workers rasterize only their page, straight from the spooled file
+                results = await asyncio.gather(
+                    *(self.run(ocr_pdf_page, path, first + i + 1, infos[i].ocr_dpi) for i in misses)
+                )
+                ocr_texts.update(zip(misses, results))
+                METRICS.inc("extraction.pages_ocr", len(misses))
+                if self.ocr_cache is not None:
+                    await self.ocr_cache.put_many({hashes[i]: ocr_texts[i] for i in misses if i in hashes})
+
+        pages = []
+        for i, info in enumerate(infos):
+            text, used_ocr = merge_page_text(info, ocr_texts.get(i))
+            pages.append(PageText(page_number=first + i + 1, text=text, used_ocr=used_ocr))
+        return pages
+
+    async def _iter_txt(self, path: str) -> AsyncIterator[PageText]:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        with open(path, "rb") as f:
+            block_no = 0
+            while True:
+                raw = await asyncio.to_thread(f.read, _TXT_BLOCK_BYTES)
+                text = decoder.decode(raw, final=not raw)
+                if text:
+                    block_no += 1
+                    yield PageText(page_number=block_no, text=normalize_block(text))
+                if not raw:
+                    return
+
+    async def iter_pages(
+        self, path: str, filename: str, content_type: Optional[str], use_ocr: bool = True
+    ) -> AsyncIterator[PageText]:
+        """Yields the document's text page by page, in order. PDF pages are parsed in
+        batches of EXTRACTION_PAGE_BATCH with the next batch prefetched, so extraction
+        overlaps with whatever the consumer does and only two batches are ever held."""
+        async with self._admit():
+            if detect_kind(filename, content_type) == "txt":
+                async for page in self._iter_txt(path):
+                    yield page
+                return
+
+            total = await self.run(pdf_num_pages, path)
+            broken = total is None
+            if broken:
+                # Broken PDF? Force OCR path if allowed
+                if not use_ocr:
+                    return
+                _require_pdf2image()
+                total = await self.run(pdf_page_count, path)
+            step = _SETTINGS.EXTRACTION_PAGE_BATCH
+
+            async def load(start: int) -> List[PageText]:
+                end = min(start + step, total)
+                if broken:
+                    infos = [PageInfo(text="") for _ in range(start, end)]
+                else:
+                    infos = await self.run(pdf_page_range, path, start, end)
+                return await self._ocr_pages(path, start, infos, use_ocr)
+
+            pending = asyncio.ensure_future(load(0)) if total else None
+            try:
+                for start in range(0, total, step):
+                    batch = await pending
+                    pending = asyncio.ensure_future(load(start + step)) if start + step < total else None
+                    for page in batch:
+                        yield page
+            finally:
+                if pending is not None:
+                    pending.cancel()
@@ -1,25 +1,59 @@
+from typing import AsyncIterator, Optional
 import ollama
 from app.core.config import get_settings
+from app.utils.llm_scheduler import LLMLease, LLMScheduler
 
 _SETTINGS = get_settings()
 
 class LLMClient:
-    def __init__(self):
+    def __init__(self, scheduler: Optional[LLMScheduler] = None):
         self.provider = _SETTINGS.LLM_PROVIDER
         self.model = _SETTINGS.LLM_MODEL
+        self.scheduler = scheduler  # admission control shared by the process; None = unlimited
         if self.provider == "ollama":
             self.client = ollama.AsyncClient(host=_SETTINGS.OLLAMA_HOST)
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
-    async def generate(self, messages, temperature=0.1, max_tokens=1024):
-        response = await self.client.chat(
-            model=self.model,
-            messages=messages,
-            options={"temperature": temperature, "num_predict": max_tokens},
-        )
+    @property
+    def degraded(self) -> bool:
+        """True while the LLM queue is deep enough that optional calls should be skipped."""
+        return self.scheduler is not None and self.scheduler.degraded
+
+    async def admit(self, call_type: str = "answer") -> Optional[LLMLease]:
+        """Waits for an LLM slot; raises LLMOverloaded when the call is shed."""
+        return await self.scheduler.acquire(call_type) if self.scheduler is not None else None
+
+    async def generate(self, messages, temperature=0.1, max_tokens=1024, call_type="answer", lease=None):
+        lease = lease or await self.admit(call_type)
+        try:
+            response = await self.client.chat(
+                model=self.model,
+                messages=messages,
+                options={"temperature": temperature, "num_predict": max_tokens},
+            )
+        finally:
+            if lease is not None:
+                lease.release()
         return response['message']['content']
 
+    async def generate_stream(self, messages, temperature=0.1, max_tokens=1024, call_type="answer", lease=None) -> AsyncIterator[str]:
+        lease = lease or await self.admit(call_type)
+        try:
+            stream = await self.client.chat(
+                model=self.model,
+                messages=messages,
+                options={"temperature": temperature, "num_predict": max_tokens},
+                stream=True,
+            )
+            async for part in stream:
+                content = part['message']['content']
+                if content:
+                    yield content
+        finally:
+            if lease is not None:
+                lease.release()
+
     async def generate_with_tools(self, messages, tools):
         response = await self.client.chat(
             model=self.model,
@@ -0,0 +1,141 @@
+# Admission control for LLM calls: concurrency cap, bounded priority queue, deadlines
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+
+_SETTINGS = get_settings()
+_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Lower runs first: a user waiting on an answer beats a query rewrite beats background work
+PRIORITIES: Dict[str, int] = {"answer": 0, "condense": 1, "summary": 2}
+
+
+class LLMOverloaded(RuntimeError):
+    """Raised when an LLM call is not admitted. `status_code` is 429 when the wait queue
+    is full and 503 when the call could not start before its deadline."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMLease:
+    """One of the scheduler's slots; `release` is idempotent."""
+
+    def __init__(self, scheduler: LLMScheduler):
+        self._scheduler = scheduler
+        self._started = time.monotonic()
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self._scheduler._release(time.monotonic() - self._started)
+
+
+class LLMScheduler:
+    """Shared by every request of the process (owned by the app lifespan).
+
+    At most `max_concurrency` calls run against the model server; up to `max_queue`
+    more wait, highest priority first (FIFO within a priority). A call that cannot
+    start within its call type's queue timeout is rejected up front when the
+    estimated wait already exceeds it, or when it runs out while waiting. Above
+    `degrade_depth` waiting calls, `degraded` tells callers to skip optional calls.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        degrade_depth: Optional[int] = None,
+    ):
+        self.max_concurrency = max_concurrency or _SETTINGS.LLM_MAX_CONCURRENCY
+        self.max_queue = max_queue if max_queue is not None else _SETTINGS.LLM_MAX_QUEUE
+        self.degrade_depth = degrade_depth if degrade_depth is not None else _SETTINGS.LLM_DEGRADE_QUEUE_DEPTH
+        self._active = 0
+        self._waiting = 0
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._service_time: Optional[float] = None  # EWMA of slot hold time, for wait estimates
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def degraded(self) -> bool:
+        return self._waiting >= self.degrade_depth
+
+    def _estimated_wait(self) -> float:
+        if self._service_time is None:
+            return 0.0
+        return math.ceil((self._waiting + 1) / self.max_concurrency) * self._service_time
+
+    def _gauges(self) -> None:
+        METRICS.set("llm.active", self._active)
+        METRICS.set("llm.queue_depth", self._waiting)
+
+    def _reject(self, call_type: str, reason: str, message: str, status_code: int) -> LLMOverloaded:
+        METRICS.inc(f"llm.rejected.{reason}")
+        retry_after = max(1, math.ceil(self._estimated_wait() or 1.0))
+        return LLMOverloaded(f"LLM is overloaded ({call_type}): {message}", status_code, retry_after)
+
+    async def acquire(self, call_type: str = "answer", timeout: Optional[float] = None) -> LLMLease:
+        if timeout is None:
+            timeout = _SETTINGS.LLM_QUEUE_TIMEOUTS.get(call_type, _SETTINGS.LLM_QUEUE_TIMEOUTS.get("answer", 10.0))
+        if self._active < self.max_concurrency and not self._waiting:
+            self._active += 1
+            METRICS.observe(f"llm.queue_wait_seconds.{call_type}", 0.0, buckets=_WAIT_BUCKETS)
+            self._gauges()
+            return LLMLease(self)
+        if self._waiting >= self.max_queue:
+            raise self._reject(call_type, "queue_full", f"{self._waiting} calls already waiting", 429)
+        estimate = self._estimated_wait()
+        if estimate > timeout:
+            raise self._reject(call_type, "deadline", f"estimated wait {estimate:.1f}s exceeds {timeout:.1f}s", 503)
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (PRIORITIES.get(call_type, len(PRIORITIES)), next(self._seq), fut))
+        self._waiting += 1
+        self._gauges()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+        except asyncio.TimeoutError:
+            if not fut.done():
+                fut.cancel()  # skipped by _release
+                self._waiting -= 1
+                self._gauges()
+                raise self._reject(call_type, "deadline", f"no slot within {timeout:.1f}s", 503)
+        except asyncio.CancelledError:
+            if fut.done():
+                self._release(None)  # the slot was handed over just as the caller went away
+            else:
+                fut.cancel()
+                self._waiting -= 1
+                self._gauges()
+            raise
+        METRICS.observe(f"llm.queue_wait_seconds.{call_type}", time.monotonic() - start, buckets=_WAIT_BUCKETS)
+        return LLMLease(self)
+
+    def _release(self, held_seconds: Optional[float]) -> None:
+        if held_seconds is not None:
+            self._service_time = held_seconds if self._service_time is None else 0.8 * self._service_time + 0.2 * held_seconds
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                # hand the slot straight to the next waiter; _active stays the same
+                self._waiting -= 1
+                fut.set_result(None)
+                self._gauges()
+                return
+        self._active -= 1
+        self._gauges()
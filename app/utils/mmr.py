@@ -0,0 +1,49 @@
+# Maximal Marginal Relevance: pick relevant but mutually dissimilar retrieval candidates
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+
+def mmr_select(
+    query: Sequence[float],
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """Indices of `k` rows of `candidates` (n x dim), in selection order.
+
+    Each step takes argmax of `lambda * relevance - (1 - lambda) * max cosine to the
+    rows already picked`. Relevance defaults to cosine with `query`; pass rerank
+    scores to use those instead (they are min-max scaled to [0, 1]). One n x n
+    similarity matmul, then O(k * n) vector updates.
+    """
+    n = len(candidates)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    vecs = _normalize(np.asarray(candidates, dtype=np.float32))
+    if relevance is None:
+        rel = vecs @ _normalize(np.asarray(query, dtype=np.float32))
+    else:
+        rel = np.asarray(relevance, dtype=np.float32)
+        span = float(rel.max() - rel.min())
+        rel = (rel - rel.min()) / span if span > 0 else np.ones(n, dtype=np.float32)
+    sim = vecs @ vecs.T
+
+    selected = [int(np.argmax(rel))]
+    redundancy = sim[selected[0]].copy()  # max similarity of each candidate to the selected set
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    for _ in range(k - 1):
+        scores = lambda_mult * rel - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, sim[best], out=redundancy)
+    return selected
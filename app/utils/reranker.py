@@ -0,0 +1,68 @@
+# Cross-encoder reranking of retrieved chunks under a per-request time budget
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import METRICS
+
+_SETTINGS = get_settings()
+
+
+class Reranker:
+    """Scores (query, passage) pairs with a local ONNX cross-encoder (fastembed) on
+    a small dedicated thread pool, so a slow rerank never blocks the event loop or
+    competes with embedding threads.
+
+    `rerank` returns None instead of scores when the budget runs out or the pool
+    is already backed up; callers then keep the retrieval order.
+    """
+
+    def __init__(self, model: Optional[str] = None, workers: Optional[int] = None):
+        self.model = model or _SETTINGS.RERANK_MODEL
+        self.workers = workers or _SETTINGS.RERANK_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rerank")
+        self._encoder = None
+        self._inflight = 0  # includes calls that timed out but are still running
+
+    def load(self) -> None:
+        """Loads the model (blocking)."""
+        if self._encoder is None:
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+            self._encoder = TextCrossEncoder(model_name=self.model)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _score(self, query: str, passages: List[str]) -> List[float]:
+        self.load()
+        start = time.perf_counter()
+        scores = list(self._encoder.rerank(query, passages, batch_size=len(passages) or 1))
+        METRICS.observe("rerank.latency_seconds", time.perf_counter() - start)
+        return scores
+
+    def _done(self, _fut) -> None:
+        self._inflight -= 1
+
+    async def rerank(self, query: str, passages: List[str], budget_ms: Optional[float] = None) -> Optional[List[float]]:
+        if not passages:
+            return []
+        if self._inflight >= self.workers * 2:
+            METRICS.inc("rerank.skipped_busy")
+            return None
+        budget = (budget_ms if budget_ms is not None else _SETTINGS.RERANK_BUDGET_MS) / 1000.0
+        loop = asyncio.get_running_loop()
+        self._inflight += 1
+        fut = loop.run_in_executor(self._executor, self._score, query, passages)
+        fut.add_done_callback(self._done)
+        try:
+            # shield: a timed-out call finishes in its thread; only this request stops waiting
+            return await asyncio.wait_for(asyncio.shield(fut), timeout=budget)
+        except asyncio.TimeoutError:
+            METRICS.inc("rerank.timeouts")
+            return None
+        except Exception:
+            METRICS.inc("rerank.errors")
+            return None
@@ -0,0 +1,46 @@
+# Sparse lexical (BM25) vectors for hybrid retrieval, via fastembed
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import get_settings
+
+_SETTINGS = get_settings()
+
+
+@dataclass
+class SparseEmbedding:
+    indices: List[int]
+    values: List[float]
+
+
+class SparseEmbeddingClient:
+    """BM25-style term vectors. Document vectors hold term frequencies only; Qdrant
+    applies IDF at query time (the sparse vector is created with `modifier=idf`)."""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or _SETTINGS.SPARSE_EMBEDDING_MODEL
+        self._model = None
+
+    def load(self) -> None:
+        """Loads the model (blocking)."""
+        if self._model is None:
+            from fastembed import SparseTextEmbedding
+            self._model = SparseTextEmbedding(model_name=self.model)
+
+    async def embed_documents(self, texts: List[str]) -> List[SparseEmbedding]:
+        def _encode() -> List[SparseEmbedding]:
+            self.load()
+            return [
+                SparseEmbedding(indices=v.indices.tolist(), values=v.values.tolist())
+                for v in self._model.embed(texts, batch_size=64)
+            ]
+        return await asyncio.to_thread(_encode)
+
+    async def embed_query(self, text: str) -> SparseEmbedding:
+        def _encode() -> SparseEmbedding:
+            self.load()
+            v = next(iter(self._model.query_embed(text)))
+            return SparseEmbedding(indices=v.indices.tolist(), values=v.values.tolist())
+        return await asyncio.to_thread(_encode)
@@ -1,15 +1,21 @@
+import hashlib
 import io
 import re
-from typing import Optional, Tuple
+from dataclasses import dataclass, field
+from typing import List, MutableMapping, Optional, Tuple, Union
 from pypdf import PdfReader
 import pytesseract
 
 try:
-    from pdf2image import convert_from_bytes  # optional (for OCR)
+    from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path  # optional (for OCR)
     _HAS_PDF2IMAGE = True
 except Exception:
     _HAS_PDF2IMAGE = False
 
+PAGE_OCR_MIN_CHARS = 100  # pages with less digital text than this are treated as scanned
+OCR_TARGET_LONG_SIDE_PX = 3300  # ~300 DPI for Letter/A4, less for larger pages
+OCR_MIN_DPI, OCR_MAX_DPI = 150, 300
+
 
 def _normalize_text(text: str) -> str:
     # Simple normalization: collapse whitespace and normalize newlines
@@ -19,6 +25,49 @@ def _normalize_text(text: str) -> str:
     return text.strip()
 
 
+def _require_pdf2image() -> None:
+    if not _HAS_PDF2IMAGE:
+        raise RuntimeError(
+            "Scanned PDF detected but pdf2image is not installed. "
+            "Install it with: pip install pdf2image (and ensure Poppler is installed)."
+        )
+
+
+@dataclass
+class PageInfo:
+    text: str
+    content_hash: Optional[str] = None  # hash of the page's content stream, images and size
+    width_pt: float = 612.0
+    height_pt: float = 792.0
+
+    @property
+    def needs_ocr(self) -> bool:
+        return len(self.text.strip()) < PAGE_OCR_MIN_CHARS
+
+    @property
+    def ocr_dpi(self) -> int:
+        long_side_in = max(self.width_pt, self.height_pt) / 72.0
+        return int(min(OCR_MAX_DPI, max(OCR_MIN_DPI, OCR_TARGET_LONG_SIDE_PX / long_side_in)))
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    pages_digital: int = 0
+    pages_ocr: int = 0
+    page_texts: List[str] = field(default_factory=list)
+
+    @property
+    def used_ocr(self) -> bool:
+        return self.pages_ocr > 0
+
+
+def normalize_block(text: str) -> str:
+    """Like _normalize_text, for a piece of a longer stream: nothing is stripped at the edges."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return re.sub(r"[ \t]+", " ", text)
+
+
 def extract_from_txt(data: bytes) -> str:
     try:
         text = data.decode("utf-8", errors="ignore")
@@ -27,63 +76,160 @@ def extract_from_txt(data: bytes) -> str:
     return _normalize_text(text)
 
 
-def extract_from_pdf(data: bytes, use_ocr: bool = True) -> Tuple[str, bool]:
-    """
-    Returns (text, used_ocr)
-    - Tries digital text extraction via pypdf
-    - Falls back to OCR if not enough text and use_ocr is True
-    """
-    text_chunks = []
+def _page_hash(page) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        box = page.mediabox
+        h.update(f"{float(box.width)}x{float(box.height)}".encode())
+        contents = page.get_contents()
+        if contents is not None:
+            h.update(contents.get_data())
+        xobjects = (page.get("/Resources") or {}).get("/XObject") or {}
+        for name in sorted(xobjects):
+            obj = xobjects[name].get_object()
+            if obj.get("/Subtype") == "/Image":
+                h.update(obj.get_data())
+    except Exception:
+        return None
+    return h.hexdigest()
+
+
+def _page_info(page) -> PageInfo:
+    try:
+        t = page.extract_text() or ""
+    except Exception:
+        t = ""
+    try:
+        width, height = float(page.mediabox.width), float(page.mediabox.height)
+    except Exception:
+        width, height = 612.0, 792.0
+    return PageInfo(text=t, content_hash=_page_hash(page), width_pt=width, height_pt=height)
+
+
+def pdf_page_infos(data: bytes) -> Optional[List[PageInfo]]:
+    """Per-page text layer, content hash and size via pypdf; None if the PDF can't be parsed at all."""
     try:
         reader = PdfReader(io.BytesIO(data))
-        for page in reader.pages:
-            try:
-                t = page.extract_text() or ""
-            except Exception:
-                t = ""
-            if t:
-                text_chunks.append(t)
+        return [_page_info(page) for page in reader.pages]
     except Exception:
+        return None
+
+
+def pdf_num_pages(path: str) -> Optional[int]:
+    """Page count via pypdf; None if the PDF can't be parsed (OCR may still read it)."""
+    try:
+        return len(PdfReader(path).pages)
+    except Exception:
+        return None
+
+
+def pdf_page_range(path: str, start: int, end: int) -> List[PageInfo]:
+    """PageInfo for pages [start, end) (0-based) of the PDF at `path`."""
+    reader = PdfReader(path)
+    return [_page_info(reader.pages[i]) for i in range(start, min(end, len(reader.pages)))]
+
+
+def pdf_page_count(source: Union[str, bytes]) -> int:
+    """Page count via Poppler, for PDFs pypdf can't parse."""
+    _require_pdf2image()
+    info = pdfinfo_from_path(source) if isinstance(source, str) else pdfinfo_from_bytes(source)
+    return int(info["Pages"])
+
+
+def ocr_pdf_page(source: Union[str, bytes], page_number: int, dpi: int = 200) -> str:
+    """Rasterizes and OCRs a single (1-based) page of a PDF given as a path or bytes."""
+    _require_pdf2image()
+    convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+    images = convert(source, dpi=dpi, first_page=page_number, last_page=page_number)  # requires Poppler
+    try:
+        return "\n\n".join(pytesseract.image_to_string(img) for img in images)
+    except Exception:
+        return ""
+
+
+def pages_to_ocr(infos: Optional[List[PageInfo]], data: bytes, use_ocr: bool) -> Tuple[List[PageInfo], List[int]]:
+    """Returns (page infos, 0-based indexes of the pages that need OCR)."""
+    if infos is None:
         # Broken PDF? Force OCR path if allowed
-        text_chunks = []
+        if not use_ocr:
+            return [], []
+        infos = [PageInfo(text="") for _ in range(pdf_page_count(data))]
+    todo = [i for i, p in enumerate(infos) if p.needs_ocr] if use_ocr else []
+    if todo:
+        _require_pdf2image()
+    return infos, todo
 
-    extracted_text = _normalize_text("\n\n".join(text_chunks))
-    if len(extracted_text) >= 200:  # heuristic threshold
-        return extracted_text, False
 
-    if not use_ocr:
-        return extracted_text, False
+def plan_pdf(data: bytes, use_ocr: bool) -> Tuple[List[PageInfo], List[int]]:
+    return pages_to_ocr(pdf_page_infos(data), data, use_ocr)
 
-    if not _HAS_PDF2IMAGE:
-        raise RuntimeError(
-            "Scanned PDF detected but pdf2image is not installed. "
-            "Install it with: pip install pdf2image (and ensure Poppler is installed)."
-        )
 
-    # OCR path
-    images = convert_from_bytes(data, dpi=200)  # requires Poppler
-    ocr_texts = []
-    for img in images:
-        try:
-            ocr_texts.append(pytesseract.image_to_string(img))
-        except Exception:
-            ocr_texts.append("")
-    final_text = _normalize_text("\n\n".join(ocr_texts))
-    return final_text, True
+def merge_page_text(info: PageInfo, ocr_text: Optional[str]) -> Tuple[str, bool]:
+    """Returns (normalized page text, used_ocr); OCR only replaces a text layer that has less text."""
+    if ocr_text is not None and len(ocr_text.strip()) > len(info.text.strip()):
+        return _normalize_text(ocr_text), True
+    return _normalize_text(info.text), False
 
 
-def extract_text_from_file(
-    filename: str, content_type: Optional[str], data: bytes, use_ocr: bool = True
-) -> Tuple[str, bool]:
+def assemble_pages(infos: List[PageInfo], ocr_texts: MutableMapping[int, str]) -> ExtractionResult:
+    page_texts, pages_ocr = [], 0
+    for i, info in enumerate(infos):
+        text, used_ocr = merge_page_text(info, ocr_texts.get(i))
+        page_texts.append(text)
+        pages_ocr += used_ocr
+    return ExtractionResult(
+        text=_normalize_text("\n\n".join(t for t in page_texts if t)),
+        pages_digital=len(infos) - pages_ocr,
+        pages_ocr=pages_ocr,
+        page_texts=page_texts,
+    )
+
+
+def extract_pdf(data: bytes, use_ocr: bool = True, ocr_cache: Optional[MutableMapping[str, str]] = None) -> ExtractionResult:
+    """
+    Page-level extraction: pages with a usable text layer are parsed digitally,
+    only sparse/empty pages are rasterized (at a DPI chosen from the page size) and OCR'd.
+    OCR output is memoized in `ocr_cache` by page content hash.
+    """
+    infos, todo = plan_pdf(data, use_ocr)
+    ocr_texts = {}
+    for i in todo:
+        key = infos[i].content_hash
+        if ocr_cache is not None and key and key in ocr_cache:
+            ocr_texts[i] = ocr_cache[key]
+            continue
+        ocr_texts[i] = ocr_pdf_page(data, i + 1, infos[i].ocr_dpi)
+        if ocr_cache is not None and key:
+            ocr_cache[key] = ocr_texts[i]
+    return assemble_pages(infos, ocr_texts)
+
+
+def extract_from_pdf(data: bytes, use_ocr: bool = True) -> Tuple[str, bool]:
     """
     Returns (text, used_ocr)
     """
+    result = extract_pdf(data, use_ocr=use_ocr)
+    return result.text, result.used_ocr
+
+
+def detect_kind(filename: str, content_type: Optional[str]) -> str:
     name = (filename or "").lower()
     ctype = (content_type or "").lower()
 
     if name.endswith(".txt") or ctype.startswith("text/"):
-        return extract_from_txt(data), False
+        return "txt"
     if name.endswith(".pdf") or "pdf" in ctype:
-        return extract_from_pdf(data, use_ocr=use_ocr)
+        return "pdf"
     # Fallback: try UTF-8
-    return extract_from_txt(data), False
\ No newline at end of file
+    return "txt"
+
+
+def extract_text_from_file(
+    filename: str, content_type: Optional[str], data: bytes, use_ocr: bool = True
+) -> Tuple[str, bool]:
+    """
+    Returns (text, used_ocr)
+    """
+    if detect_kind(filename, content_type) == "pdf":
+        return extract_from_pdf(data, use_ocr=use_ocr)
+    return extract_from_txt(data), False
@@ -0,0 +1,171 @@
+"""Ingestion worker: runs jobs queued by `POST /ingest?async=true`.
+
+Usage: python -m app.worker [--concurrency N]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+from qdrant_client import AsyncQdrantClient
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.db import session_scope
+from app.repositories.answer_cache import SemanticAnswerCache
+from app.repositories.job_queue import IngestJobQueue
+from app.repositories.ocr_cache import OcrCache
+from app.repositories.vector_store import create_qdrant_client, create_vector_store
+from app.services.ingestion_service import IngestionService, IngestProgress
+from app.utils.embeddings import EmbeddingClient, EmbeddingRegistry
+from app.utils.extraction_pool import ExtractionPool
+from app.utils.sparse_embeddings import SparseEmbeddingClient
+
+_SETTINGS = get_settings()
+
+
+class IngestWorker:
+    def __init__(
+        self,
+        queue: IngestJobQueue,
+        qdrant: AsyncQdrantClient,
+        embedder: EmbeddingClient,
+        extraction_pool: ExtractionPool,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        sparse_embedder: Optional[SparseEmbeddingClient] = None,
+    ):
+        self.queue = queue
+        self.qdrant = qdrant
+        self.embedder = embedder
+        self.extraction_pool = extraction_pool
+        self.answer_cache = answer_cache
+        self.sparse_embedder = sparse_embedder
+        self._stop = asyncio.Event()
+        self._next_recovery = 0.0  # monotonic time of the next stale-job sweep; 0 = at startup
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def process(self, job_id: str) -> None:
+        job = await self.queue.get(job_id)
+        if job is None:
+            await self.queue.release(job_id)
+            return
+        params = job["params"]
+        attempts = job.get("attempts", 0) + 1
+        await self.queue.update(job_id, status="running", stage="extracting", attempts=attempts, started_at=time.time())
+
+        async def on_progress(p: IngestProgress) -> None:
+            await self.queue.update(job_id, stage=p.stage, progress=p.to_dict(), timings=p.timings)
+
+        error, retryable = None, False
+        try:
+            if not os.path.exists(params["path"]):
+                raise HTTPException(status_code=410, detail="Spooled upload is missing")
+            async with session_scope() as session:
+                service = IngestionService(
+                    vector_store=create_vector_store(
+                        client=self.qdrant, collection=_SETTINGS.QDRANT_COLLECTION,
+                        sparse_vector_name=_SETTINGS.SPARSE_VECTOR_NAME,
+                    ),
+                    embedder=self.embedder,
+                    session=session,
+                    answer_cache=self.answer_cache,
+                    extraction_pool=self.extraction_pool,
+                    sparse_embedder=self.sparse_embedder,
+                )
+                result = await service.ingest_path(
+                    params["path"],
+                    filename=params["filename"],
+                    content_type=params.get("content_type"),
+                    checksum=params["checksum"],
+                    chunk_strategy=params["chunk_strategy"],
+                    chunk_size=params["chunk_size"],
+                    overlap=params["overlap"],
+                    use_ocr=params["use_ocr"],
+                    extra_metadata=params.get("extra_metadata"),
+                    document_id=params.get("document_id"),
+                    source_uri=params.get("source_uri"),
+                    on_progress=on_progress,
+                )
+        except HTTPException as e:
+            # 4xx means the file itself is bad; 5xx (provider, vector store, DB, busy pool) may succeed later
+            error, retryable = str(e.detail), e.status_code >= 500
+        except Exception as e:
+            error, retryable = str(e), True
+
+        if error is None:
+            await self.queue.update(job_id, status="completed", stage="completed", result=result.model_dump(), finished_at=time.time())
+            await self.queue.release(job_id)
+        elif retryable and attempts < _SETTINGS.INGEST_JOB_MAX_ATTEMPTS:
+            # The retry re-checks documents.checksum, so a job that actually committed is not ingested twice.
+            # Exponential backoff, so an outage of Qdrant or MySQL does not use up every attempt in seconds
+            delay = min(_SETTINGS.INGEST_JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), _SETTINGS.INGEST_JOB_RETRY_MAX_SECONDS)
+            await self.queue.update(job_id, status="queued", stage="queued", error=error, not_before=time.time() + delay)
+            await self.queue.release(job_id, requeue=True, delay=delay)
+            return
+        else:
+            await self.queue.update(job_id, status="failed", error=error, finished_at=time.time())
+            await self.queue.release(job_id)
+        try:
+            os.unlink(params["path"])
+        except OSError:
+            pass
+
+    async def _housekeeping(self) -> None:
+        """Promotes due retries and, every INGEST_JOB_RECOVER_INTERVAL_SECONDS, requeues jobs
+        claimed by workers that died, so recovery does not wait for a worker restart."""
+        await self.queue.promote_due()
+        if time.monotonic() >= self._next_recovery:
+            self._next_recovery = time.monotonic() + _SETTINGS.INGEST_JOB_RECOVER_INTERVAL_SECONDS
+            await self.queue.recover_stale(_SETTINGS.INGEST_JOB_STALE_SECONDS)
+
+    async def _consume(self) -> None:
+        while not self._stop.is_set():
+            await self._housekeeping()
+            job_id = await self.queue.claim(timeout=2.0)
+            if job_id:
+                await self.process(job_id)
+
+    async def run(self, concurrency: int) -> None:
+        await asyncio.gather(*(self._consume() for _ in range(concurrency)))
+
+
+async def main(concurrency: int) -> None:
+    if _SETTINGS.VECTOR_BACKEND == "local":
+        raise SystemExit("The ingestion worker needs a shared vector store; VECTOR_BACKEND=local is single-process only")
+    qdrant = create_qdrant_client()
+    client = redis.from_url(_SETTINGS.REDIS_URL, decode_responses=True)
+    embedder = await EmbeddingRegistry().load()
+    extraction_pool = ExtractionPool(ocr_cache=OcrCache(client))
+    answer_cache = None
+    if _SETTINGS.SEMANTIC_CACHE_ENABLED:
+        answer_cache = SemanticAnswerCache(create_vector_store(client=qdrant, collection=_SETTINGS.semantic_cache_collection))
+
+    sparse_embedder = None
+    if _SETTINGS.SPARSE_EMBEDDING_MODEL:
+        sparse_embedder = SparseEmbeddingClient()
+        await asyncio.to_thread(sparse_embedder.load)
+
+    worker = IngestWorker(IngestJobQueue(client), qdrant, embedder, extraction_pool, answer_cache, sparse_embedder)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    print(f"Ingestion worker started (concurrency={concurrency})")
+    try:
+        await worker.run(concurrency)
+    finally:
+        extraction_pool.shutdown()
+        await qdrant.close()
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the async ingestion worker.")
+    parser.add_argument("--concurrency", type=int, default=_SETTINGS.INGEST_WORKER_CONCURRENCY,
+                        help="jobs processed concurrently by this worker")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
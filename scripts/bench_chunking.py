@@ -0,0 +1,110 @@
+"""Chunking throughput: the previous chunkers vs the single-pass ones in app.utils.chunking.
+
+    python scripts/bench_chunking.py                    # synthetic ~5 MB text
+    python scripts/bench_chunking.py --file big.txt --repeat 5
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.chunking import (  # noqa: E402
+    _ENC, _SENT_SPLIT, _decode, _encode, chunk_fixed_tokens, chunk_semantic, count_tokens,
+)
+
+
+# Previous implementations, kept here as the baseline
+def legacy_fixed(text: str, chunk_size: int = 500, overlap: int = 50) -> List[Tuple[str, int]]:
+    toks = _encode(text)
+    n = len(toks)
+    chunks: List[Tuple[str, int]] = []
+    i = 0
+    while i < n:
+        j = min(i + chunk_size, n)
+        sub = toks[i:j]
+        chunks.append((_decode(sub), len(sub)))
+        if j == n:
+            break
+        i = max(0, j - overlap)
+    return chunks
+
+
+def legacy_semantic(text: str, max_tokens: int = 500, overlap_sentences: int = 2) -> List[Tuple[str, int]]:
+    chunks: List[Tuple[str, int]] = []
+    curr: List[str] = []
+    curr_tok = 0
+    for sent in _SENT_SPLIT.split(text):
+        stoks = count_tokens(sent)
+        if curr and curr_tok + stoks > max_tokens:
+            chunk_text = " ".join(curr).strip()
+            chunks.append((chunk_text, count_tokens(chunk_text)))
+            curr = curr[-overlap_sentences:] if overlap_sentences > 0 else []
+            curr_tok = count_tokens(" ".join(curr)) if curr else 0
+        curr.append(sent)
+        curr_tok += stoks
+    if curr:
+        chunk_text = " ".join(curr).strip()
+        if chunk_text:
+            chunks.append((chunk_text, count_tokens(chunk_text)))
+    return chunks
+
+
+def _synthetic_text(target_chars: int) -> str:
+    rng = random.Random(0)
+    words = ("the of and to in is for on with as by at from that this which retrieval vector "
+             "embedding document chunk token model index query latency throughput").split()
+    sentences, size = [], 0
+    while size < target_chars:
+        s = " ".join(rng.choice(words) for _ in range(rng.randint(6, 30))).capitalize() + rng.choice(".!?")
+        sentences.append(s)
+        size += len(s) + 1
+    return " ".join(sentences)
+
+
+def _bench(fn: Callable[[str], List[Tuple[str, int]]], text: str, repeat: int) -> Tuple[float, int]:
+    best, chunks = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = len(fn(text))
+        best = min(best, time.perf_counter() - start)
+    return best, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="UTF-8 text file to chunk (default: synthetic text)")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="size of the synthetic text")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per chunker; the best is reported")
+    args = parser.parse_args()
+
+    text = Path(args.file).read_text(encoding="utf-8") if args.file else _synthetic_text(int(args.size_mb * 1e6))
+    if _ENC is None:
+        print("tiktoken not installed: timing the char-level fallback tokenizer")
+    chunk_fixed_tokens("warmup " * 100)  # builds the token byte-length table
+
+    mb = len(text.encode("utf-8")) / 1e6
+    overlap_sentences = max(0, args.overlap // 50)
+    cases = [
+        ("fixed", lambda t: legacy_fixed(t, args.chunk_size, args.overlap),
+         lambda t: chunk_fixed_tokens(t, args.chunk_size, args.overlap)),
+        ("semantic", lambda t: legacy_semantic(t, args.chunk_size, overlap_sentences),
+         lambda t: chunk_semantic(t, args.chunk_size, overlap_sentences)),
+    ]
+    print(f"{mb:.1f} MB, chunk_size={args.chunk_size}, overlap={args.overlap}, best of {args.repeat}")
+    for name, old, new in cases:
+        t_old, n_old = _bench(old, text, args.repeat)
+        t_new, n_new = _bench(new, text, args.repeat)
+        print(
+            f"{name:>9}: old {t_old:7.3f}s ({mb / t_old:6.2f} MB/s, {n_old} chunks) | "
+            f"new {t_new:7.3f}s ({mb / t_new:6.2f} MB/s, {n_new} chunks) | {t_old / t_new:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
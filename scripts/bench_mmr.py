@@ -0,0 +1,62 @@
+"""MMR selection cost and effect on synthetic candidates with near-duplicate clusters.
+
+    python scripts/bench_mmr.py                          # 100 candidates of EMBEDDING_DIM, k=4/8/16
+    python scripts/bench_mmr.py --candidates 200 --lambda 0.7
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.utils.mmr import _normalize, mmr_select  # noqa: E402
+
+_SETTINGS = get_settings()
+
+
+def candidates(n: int, dim: int, clusters: int, rng: np.random.Generator):
+    """Query plus `n` candidates drawn around `clusters` topics (so many are near-duplicates)."""
+    query = _normalize(rng.standard_normal(dim).astype(np.float32))
+    topics = _normalize(query + 0.9 * rng.standard_normal((clusters, dim)).astype(np.float32))
+    members = topics[rng.integers(0, clusters, n)] + 0.05 * rng.standard_normal((n, dim)).astype(np.float32)
+    return query, _normalize(members), topics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time MMR selection over retrieval candidates.")
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=_SETTINGS.EMBEDDING_DIM)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--lambda", dest="lambda_mult", type=float, default=_SETTINGS.MMR_LAMBDA)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    query, vecs, topics = candidates(args.candidates, args.dim, args.clusters, rng)
+    topic_of = np.argmax(vecs @ topics.T, axis=1)
+    by_relevance = np.argsort(-(vecs @ query))
+
+    print(f"{args.candidates} candidates, dim={args.dim}, {args.clusters} clusters, lambda={args.lambda_mult}")
+    for k in (4, 8, 16):
+        mmr_select(query, vecs, k, args.lambda_mult)  # warm-up
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            picked = mmr_select(query, vecs, k, args.lambda_mult)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        top_topics = len(set(topic_of[by_relevance[:k]]))
+        mmr_topics = len(set(topic_of[picked]))
+        print(
+            f"k={k:<3} median {statistics.median(times):.3f} ms  p99 {times[int(len(times) * 0.99) - 1]:.3f} ms"
+            f"  | distinct clusters: top-k {top_topics}, MMR {mmr_topics}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Qdrant upsert throughput: the previous list-of-lists path vs float32 arrays, over REST and gRPC.
+
+Two comparisons are reported separately: vector format (per-row lists vs one float32
+array, same transport) and transport (REST vs gRPC, same vector format).
+
+    python scripts/bench_upsert.py                       # 20k random vectors of EMBEDDING_DIM
+    python scripts/bench_upsert.py --points 50000 --batch 512
+
+Writes into a temporary collection (dropped afterwards) on QDRANT_URL; the gRPC
+runs need the Qdrant gRPC port (QDRANT_GRPC_PORT, 6334) to be reachable.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+from qdrant_client.models import Batch, Distance, VectorParams  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.repositories.vector_store import VectorStore  # noqa: E402
+
+_SETTINGS = get_settings()
+
+
+async def legacy_upsert(client: AsyncQdrantClient, collection: str, ids: List[str], vectors: np.ndarray, payloads) -> None:
+    # Previous path: the embedder returned List[List[float]], one ndarray.tolist() per vector
+    as_lists = [vec.tolist() for vec in vectors]
+    await client.upsert(collection_name=collection, points=Batch(ids=ids, vectors=as_lists, payloads=payloads))
+
+
+async def run(label: str, client: AsyncQdrantClient, args, vectors: np.ndarray, legacy: bool) -> float:
+    collection = f"bench_upsert_{uuid.uuid4().hex[:8]}"
+    await client.create_collection(collection, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+    store = VectorStore(client, collection)
+    ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
+    payloads = [{"doc_id": "bench", "chunk_index": i} for i in range(len(vectors))]
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(vectors), args.batch):
+            part = slice(i, i + args.batch)
+            if legacy:
+                await legacy_upsert(client, collection, ids[part], vectors[part], payloads[part])
+            else:
+                await store.upsert(ids[part], vectors[part], payloads[part])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {len(vectors) / elapsed:>10,.0f} points/s  ({elapsed:.2f}s)")
+        return len(vectors) / elapsed
+    finally:
+        await client.delete_collection(collection)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Qdrant upsert throughput by vector format and transport.")
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=_SETTINGS.EMBEDDING_DIM)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--no-grpc", action="store_true", help="skip the gRPC run")
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).standard_normal((args.points, args.dim), dtype=np.float32)
+    rest = AsyncQdrantClient(url=_SETTINGS.QDRANT_URL)
+    rest_lists = await run("lists, REST (before)", rest, args, vectors, legacy=True)
+    rest_array = await run("float32 array, REST", rest, args, vectors, legacy=False)
+    await rest.close()
+    print(f"vector format (REST):  array is {rest_array / rest_lists:.2f}x lists")
+    if not args.no_grpc:
+        grpc = AsyncQdrantClient(url=_SETTINGS.QDRANT_URL, prefer_grpc=True, grpc_port=_SETTINGS.QDRANT_GRPC_PORT)
+        await run("lists, gRPC", grpc, args, vectors, legacy=True)
+        grpc_array = await run("float32 array, gRPC (after)", grpc, args, vectors, legacy=False)
+        await grpc.close()
+        print(f"transport (arrays):    gRPC is {grpc_array / rest_array:.2f}x REST")
+
+if __name__ == "__main__":
+    asyncio.run(main())
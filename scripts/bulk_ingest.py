@@ -0,0 +1,284 @@
+"""Bulk corpus loader: ingest a directory (or manifest) of .pdf/.txt files.
+
+    python scripts/bulk_ingest.py ./corpus --workers 8
+    python scripts/bulk_ingest.py --manifest files.jsonl   # {"path": ..., "metadata": {...}} or one path per line
+
+Extraction + chunking run in a process pool; embedding is batched across
+documents; Qdrant upserts and MySQL inserts are done in large batches. Files
+whose checksum is already in `documents` are skipped. Point and document ids
+are derived from the checksum, so a crashed run can simply be started again:
+documents committed before the crash are skipped, partially written vectors
+are overwritten.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import bindparam, text as sql_text  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.db import session_scope  # noqa: E402
+from app.repositories.vector_store import VectorStore, create_qdrant_client, create_vector_store  # noqa: E402
+from app.utils.chunking import chunk_fixed_tokens, chunk_semantic  # noqa: E402
+from app.utils.embedding_cache import embedding_cache_key  # noqa: E402
+from app.utils.embeddings import EmbeddingClient  # noqa: E402
+from app.utils.sparse_embeddings import SparseEmbeddingClient  # noqa: E402
+from app.utils.text_extraction import extract_text_from_file  # noqa: E402
+
+_SETTINGS = get_settings()
+_ID_NAMESPACE = uuid.UUID("6f1c3a5e-2b7d-4c1e-9a0f-8d2e4b6c7a91")
+_EXTENSIONS = {".pdf": "application/pdf", ".txt": "text/plain"}
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_and_chunk(path: str, strategy: str, chunk_size: int, overlap: int, use_ocr: bool) -> Tuple[List[Tuple[str, int]], bool]:
+    """Runs in a worker process. Returns (chunks, used_ocr)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    text, used_ocr = extract_text_from_file(
+        filename=path, content_type=_EXTENSIONS.get(Path(path).suffix.lower()), data=data, use_ocr=use_ocr
+    )
+    if not text or len(text) < 10:
+        return [], used_ocr
+    if strategy == "fixed":
+        return chunk_fixed_tokens(text, chunk_size=chunk_size, overlap=overlap), used_ocr
+    return chunk_semantic(text, max_tokens=chunk_size, overlap_sentences=max(0, overlap // 50)), used_ocr
+
+
+def _collect(root: Optional[str], manifest: Optional[str]) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    files: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    entry = json.loads(line)
+                    files.append((entry["path"], entry.get("metadata")))
+                else:
+                    files.append((line, None))
+    if root:
+        for p in sorted(Path(root).rglob("*")):
+            if p.is_file() and p.suffix.lower() in _EXTENSIONS:
+                files.append((str(p), None))
+    return files
+
+
+class BulkLoader:
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        vector_store: VectorStore,
+        embedder: EmbeddingClient,
+        sparse_embedder: Optional[SparseEmbeddingClient] = None,
+    ):
+        self.args = args
+        self.vector_store = vector_store
+        self.embedder = embedder
+        self.sparse_embedder = sparse_embedder
+        self.docs = self.chunks = self.skipped = self.failed = 0
+        self._pending: List[Dict[str, Any]] = []  # extracted docs waiting to be embedded + written
+
+    async def _existing_checksums(self, checksums: List[str]) -> set:
+        found = set()
+        query = sql_text("SELECT checksum FROM documents WHERE checksum IN :cks").bindparams(
+            bindparam("cks", expanding=True)
+        )
+        async with session_scope() as session:
+            for i in range(0, len(checksums), 1000):
+                rows = await session.execute(query, {"cks": checksums[i:i + 1000]})
+                found.update(r[0] for r in rows)
+        return found
+
+    async def _flush(self) -> None:
+        docs, self._pending = self._pending, []
+        if not docs:
+            return
+        ids, texts, payloads, rows = [], [], [], []
+        for doc in docs:
+            for idx, (chunk_text, tok) in enumerate(doc["chunks"]):
+                cid = str(uuid.uuid5(_ID_NAMESPACE, f"{doc['checksum']}:{idx}"))
+                content_hash = embedding_cache_key(self.embedder.model, chunk_text)
+                payload = {
+                    "doc_id": doc["id"],
+                    "chunk_index": idx,
+                    "filename": doc["filename"],
+                    "token_count": tok,
+                    "mime_type": doc["mime"],
+                    "source": doc["filename"],
+                    "text": chunk_text,
+                    "chunk_hash": content_hash,
+                }
+                if doc["metadata"]:
+                    payload.update(doc["metadata"])
+                ids.append(cid)
+                texts.append(chunk_text)
+                payloads.append(payload)
+                rows.append({"id": cid, "doc_id": doc["id"], "chunk_index": idx, "token_count": tok, "vector_id": cid, "content_hash": content_hash})
+
+        # Embedding batched across documents
+        vectors = np.concatenate([np.empty((0, _SETTINGS.EMBEDDING_DIM), dtype=np.float32)] + [
+            await self.embedder.embed_array(texts[i:i + self.args.embed_batch])
+            for i in range(0, len(texts), self.args.embed_batch)
+        ])
+        sparse = await self.sparse_embedder.embed_documents(texts) if self.sparse_embedder else None
+        await self.vector_store.upsert_many(
+            ids=ids, vectors=vectors, payloads=payloads, sparse_vectors=sparse,
+            parallelism=self.args.upsert_parallelism, wait=False,
+        )
+        await self.vector_store.confirm_points(ids)
+
+        async with session_scope() as session:
+            await session.execute(
+                sql_text(
+                    "INSERT INTO documents (id, title, source_uri, mime_type, checksum) "
+                    "VALUES (:id, :title, :src, :mime, :ck)"
+                ),
+                [{"id": d["id"], "title": d["filename"], "src": d["path"], "mime": d["mime"], "ck": d["checksum"]} for d in docs],
+            )
+            await session.execute(
+                sql_text(
+                    "INSERT INTO chunks (id, doc_id, chunk_index, page_start, page_end, heading, token_count, vector_id, content_hash) "
+                    "VALUES (:id, :doc_id, :chunk_index, NULL, NULL, NULL, :token_count, :vector_id, :content_hash)"
+                ),
+                rows,
+            )
+            await session.commit()
+        self.docs += len(docs)
+        self.chunks += len(rows)
+        print(f"  committed {self.docs} docs / {self.chunks} chunks")
+
+    async def run(self, files: List[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        loop = asyncio.get_running_loop()
+        checksums = await asyncio.gather(*(asyncio.to_thread(_file_sha256, p) for p, _ in files))
+        existing = await self._existing_checksums(list(set(checksums)))
+        todo, seen = [], set(existing)
+        for (path, meta), ck in zip(files, checksums):
+            if ck in seen:
+                self.skipped += 1
+                continue
+            seen.add(ck)
+            todo.append((path, meta, ck))
+        print(f"{len(files)} files, {self.skipped} already ingested, {len(todo)} to process")
+
+        a = self.args
+        with ProcessPoolExecutor(max_workers=a.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            async def extract(path: str, meta: Optional[Dict[str, Any]], ck: str) -> Optional[Dict[str, Any]]:
+                try:
+                    chunks, _ = await loop.run_in_executor(
+                        pool, _extract_and_chunk, path, a.strategy, a.chunk_size, a.overlap, not a.no_ocr
+                    )
+                except Exception as e:
+                    print(f"  ! {path}: {e}")
+                    chunks = []
+                if not chunks:
+                    self.failed += 1
+                    return None
+                return {
+                    "id": str(uuid.uuid5(_ID_NAMESPACE, ck)),
+                    "path": os.path.abspath(path),
+                    "filename": Path(path).name,
+                    "mime": _EXTENSIONS.get(Path(path).suffix.lower()),
+                    "checksum": ck,
+                    "metadata": meta,
+                    "chunks": chunks,
+                }
+
+            # Sliding window, refilled as soon as documents finish: at most 2x workers documents
+            # are being extracted at once, and the buffer is flushed once it reaches upsert_batch
+            # chunks. Memory is bounded by those in-flight documents, fewer than upsert_batch
+            # buffered chunks, and the document(s) that just pushed the buffer over the threshold.
+            queued = iter(todo)
+            running: set = set()
+
+            def refill() -> None:
+                while len(running) < a.workers * 2:
+                    item = next(queued, None)
+                    if item is None:
+                        return
+                    running.add(asyncio.ensure_future(extract(*item)))
+
+            refill()
+            pending_chunks = 0
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    doc = fut.result()
+                    if doc is not None:
+                        self._pending.append(doc)
+                        pending_chunks += len(doc["chunks"])
+                if pending_chunks >= a.upsert_batch:
+                    await self._flush()
+                    pending_chunks = 0
+                refill()
+            await self._flush()
+
+
+async def main(args: argparse.Namespace) -> None:
+    files = _collect(args.path, args.manifest)
+    if not files:
+        print("No .pdf/.txt files found.")
+        return
+    qdrant = create_qdrant_client()
+    embedder = EmbeddingClient()
+    await asyncio.to_thread(embedder.load)
+    sparse_embedder = None
+    if _SETTINGS.SPARSE_EMBEDDING_MODEL:
+        sparse_embedder = SparseEmbeddingClient()
+        await asyncio.to_thread(sparse_embedder.load)
+    vector_store = create_vector_store(
+        client=qdrant, collection=_SETTINGS.QDRANT_COLLECTION, sparse_vector_name=_SETTINGS.SPARSE_VECTOR_NAME
+    )
+    loader = BulkLoader(args, vector_store, embedder, sparse_embedder)
+    start = time.perf_counter()
+    try:
+        await loader.run(files)
+    finally:
+        await qdrant.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Done in {elapsed:.1f}s: {loader.docs} docs, {loader.chunks} chunks, "
+        f"{loader.skipped} skipped, {loader.failed} failed | "
+        f"{loader.docs / elapsed:.2f} docs/s, {loader.chunks / elapsed:.1f} chunks/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or manifest of .pdf/.txt files.")
+    parser.add_argument("path", nargs="?", help="directory to walk recursively")
+    parser.add_argument("--manifest", help="file with one path (or JSON object with path/metadata) per line")
+    parser.add_argument("--strategy", choices=["fixed", "semantic"], default="semantic")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--no-ocr", action="store_true")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--embed-batch", type=int, default=256, help="chunks per embedding call")
+    parser.add_argument("--upsert-batch", type=int, default=1024, help="chunks per flush (embed, upsert, commit)")
+    parser.add_argument(
+        "--upsert-parallelism", type=int, default=_SETTINGS.QDRANT_UPSERT_PARALLELISM,
+        help="Qdrant upsert requests in flight (QDRANT_UPSERT_BATCH_SIZE points each)",
+    )
+    args = parser.parse_args()
+    if not args.path and not args.manifest:
+        parser.error("give a directory and/or --manifest")
+    asyncio.run(main(args))
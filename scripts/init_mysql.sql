@@ -8,7 +8,8 @@ CREATE TABLE IF NOT EXISTS documents (
   mime_type VARCHAR(100),
   checksum CHAR(64),
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  UNIQUE KEY uniq_checksum (checksum)
+  UNIQUE KEY uniq_checksum (checksum),
+  INDEX idx_source_uri (source_uri)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE IF NOT EXISTS chunks (
@@ -20,11 +21,16 @@ CREATE TABLE IF NOT EXISTS chunks (
   heading VARCHAR(255) NULL,
   token_count INT NULL,
   vector_id VARCHAR(128) NOT NULL,
+  content_hash CHAR(64) NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   INDEX idx_doc_chunk (doc_id, chunk_index),
   CONSTRAINT fk_chunks_doc FOREIGN KEY (doc_id) REFERENCES documents(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Existing databases:
+--   ALTER TABLE documents ADD INDEX idx_source_uri (source_uri);
+--   ALTER TABLE chunks ADD COLUMN content_hash CHAR(64) NULL AFTER vector_id;
+
 CREATE TABLE IF NOT EXISTS conversations (
   id CHAR(36) PRIMARY KEY,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
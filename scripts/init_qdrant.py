@@ -1,22 +1,128 @@
-import os
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
-from dotenv import load_dotenv
-
-load_dotenv()
-
-collection = os.getenv("QDRANT_COLLECTION", "docs")
-dim = int(os.getenv("EMBEDDING_DIM", "1536"))
-url = os.getenv("QDRANT_URL", "http://localhost:6333")
-
-client = QdrantClient(url=url)
-
-existing = [c.name for c in client.get_collections().collections]
-if collection in existing:
-    print(f"Collection '{collection}' already exists with dim you created earlier.")
-else:
-    client.create_collection(
-        collection_name=collection,
-        vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
-    )
-    print(f"Created collection '{collection}' with dim={dim}, metric=cosine")
\ No newline at end of file
+"""Create or migrate the Qdrant collection using a named performance profile.
+
+    python scripts/init_qdrant.py                                # create QDRANT_COLLECTION (profile: QDRANT_PROFILE)
+    python scripts/init_qdrant.py --profile int8 --collection docs_int8
+    python scripts/init_qdrant.py --list-profiles
+    python scripts/init_qdrant.py --profile int8 --collection docs_int8 --migrate-from docs_local --alias docs
+
+Migration scrolls the source collection with its vectors and re-upserts the points
+into the new collection, so nothing is re-embedded. With --alias, the alias is
+switched to the new collection once the copy is complete; point QDRANT_COLLECTION
+at the alias to swap collections without redeploying. Set QDRANT_PROFILE to the
+profile in use so queries get its hnsw_ef / oversampling settings.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import (  # noqa: E402
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, Modifier, PayloadSchemaType,
+    PointStruct, SparseVectorParams,
+)
+
+from app.core.config import get_settings  # noqa: E402
+from app.repositories.collection_profiles import PROFILES, CollectionProfile, get_profile  # noqa: E402
+
+_SETTINGS = get_settings()
+_SCHEMA_TYPES = {
+    "keyword": PayloadSchemaType.KEYWORD,
+    "integer": PayloadSchemaType.INTEGER,
+    "bool": PayloadSchemaType.BOOL,
+}
+
+
+def _indexes() -> Dict[str, str]:
+    # chunk_hash for embedding reuse at ingest, the rest for filtered retrieval (ChatRequest.filters)
+    indexes = {"chunk_hash": "keyword", "doc_id": "keyword", "filename": "keyword", "mime_type": "keyword"}
+    indexes.update(_SETTINGS.INDEXED_PAYLOAD_FIELDS)
+    return indexes
+
+
+def create(client: QdrantClient, collection: str, profile: CollectionProfile, dim: int) -> None:
+    if client.collection_exists(collection):
+        print(f"Collection '{collection}' already exists; left unchanged (use --migrate-from to rebuild it elsewhere).")
+        info = client.get_collection(collection)
+        if _SETTINGS.SPARSE_VECTOR_NAME not in (info.config.params.sparse_vectors or {}):
+            print(f"  note: no '{_SETTINGS.SPARSE_VECTOR_NAME}' sparse vector; migrate to a new collection for hybrid retrieval")
+    else:
+        client.create_collection(
+            collection_name=collection,
+            vectors_config=profile.vectors_config(dim),
+            # BM25: documents store term frequencies, Qdrant applies IDF at query time
+            sparse_vectors_config={_SETTINGS.SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config(),
+            on_disk_payload=profile.payload_on_disk,
+        )
+        print(f"Created collection '{collection}' with dim={dim}, metric=cosine, profile '{profile.name}'")
+
+    for field, kind in _indexes().items():
+        client.create_payload_index(collection_name=collection, field_name=field, field_schema=_SCHEMA_TYPES[kind])
+        print(f"Ensured {kind} index on '{field}'")
+
+
+def migrate(client: QdrantClient, source: str, target: str, batch: int) -> None:
+    total = client.count(source, exact=True).count
+    copied, offset = 0, None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=batch, offset=offset, with_payload=True, with_vectors=True
+        )
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                wait=True,
+            )
+            copied += len(points)
+            print(f"  copied {copied}/{total}")
+        if offset is None:
+            break
+    landed = client.count(target, exact=True).count
+    if landed < total:
+        raise SystemExit(f"Migration incomplete: {landed} of {total} points in '{target}'")
+    print(f"Migrated {copied} points from '{source}' to '{target}'")
+
+
+def point_alias(client: QdrantClient, alias: str, collection: str) -> None:
+    ops = []
+    if any(a.alias_name == alias for a in client.get_aliases().aliases):
+        ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    ops.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=ops)  # applied atomically
+    print(f"Alias '{alias}' -> '{collection}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create or migrate the Qdrant collection using a performance profile.")
+    parser.add_argument("--collection", default=_SETTINGS.QDRANT_COLLECTION)
+    parser.add_argument("--profile", default=_SETTINGS.QDRANT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--dim", type=int, default=_SETTINGS.EMBEDDING_DIM)
+    parser.add_argument("--migrate-from", metavar="COLLECTION", help="copy points (with vectors) from this collection")
+    parser.add_argument("--batch", type=int, default=256, help="points per scroll/upsert during migration")
+    parser.add_argument("--alias", help="point this alias at --collection when done")
+    parser.add_argument("--list-profiles", action="store_true")
+    args = parser.parse_args()
+
+    if args.list_profiles:
+        for p in PROFILES.values():
+            print(f"{p.name:>12}  {p.description}")
+            print(f"{'':>12}  m={p.m} ef_construct={p.ef_construct} hnsw_ef={p.hnsw_ef} oversampling={p.oversampling}")
+        return
+
+    client = QdrantClient(url=_SETTINGS.QDRANT_URL)
+    if args.migrate_from and args.migrate_from == args.collection:
+        parser.error("--migrate-from must differ from --collection")
+    create(client, args.collection, get_profile(args.profile), args.dim)
+    if args.migrate_from:
+        migrate(client, args.migrate_from, args.collection, args.batch)
+    if args.alias:
+        point_alias(client, args.alias, args.collection)
+
+
+if __name__ == "__main__":
+    main()